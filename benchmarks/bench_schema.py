@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""Benchmarks of schema generation and encoding.
+
+Synthesizes a Django project with N endpoints and M serializers (nested up to a given depth, with versioned
+serializers and paginated list views), then times the main stages of producing the OpenAPI document:
+
+- ``get_schema``: :code:`OpenApiSchemaGenerator.get_schema`, from endpoint enumeration to the coreapi document
+- ``get_response_object``: :code:`OpenApiSchemaGenerator.get_response_object` over every serializer
+- ``encode``: :code:`OpenAPICodec.encode` of the generated document, through the OpenAPI renderer
+- ``view_cold``: a GET of :code:`SchemaView` with caching disabled, end-to-end through Django
+- ``view_cached``: a GET of :code:`SchemaView` served from its cache (generated again on trees without a cache)
+
+For each stage, the wall time (best and median of ``--repeat`` runs), the peak memory allocated during one run
+(measured separately with tracemalloc) and the output size are recorded. Results are written as JSON along with
+the git commit and library versions, and ``--compare`` prints the ratios against an earlier result file::
+
+    python benchmarks/bench_schema.py --endpoints 50,200 --output before.json
+    git checkout my-branch
+    python benchmarks/bench_schema.py --endpoints 50,200 --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+VERSIONS = ('1.0', '2.0')
+
+
+def configure(openapi_settings):
+    from django.conf import settings
+
+    settings.configure(
+        DEBUG=False,
+        SECRET_KEY='benchmarks',
+        ALLOWED_HOSTS=['*'],
+        ROOT_URLCONF=None,
+        INSTALLED_APPS=[
+            'django.contrib.auth',
+            'django.contrib.contenttypes',
+            'rest_framework',
+            'drf_openapi',
+        ],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'APP_DIRS': True}],
+        REST_FRAMEWORK={
+            'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning',
+            'UNAUTHENTICATED_USER': None,
+        },
+        DRF_OPENAPI=openapi_settings,
+    )
+
+    import django
+    django.setup()
+
+
+def make_serializers(count, field_count, depth):
+    """
+    Return ``count`` serializer classes with ``field_count`` plain fields each.
+    Serializers of nesting level L > 0 nest one serializer of level L - 1 and a list of another,
+    so that lower level serializers are shared by many others, like address or money blocks are in real APIs.
+    """
+    from rest_framework import serializers
+
+    field_factories = (
+        lambda: serializers.CharField(max_length=100, help_text='A string'),
+        lambda: serializers.IntegerField(min_value=0),
+        lambda: serializers.BooleanField(required=False),
+        lambda: serializers.ChoiceField(choices=('a', 'b', 'c')),
+        lambda: serializers.ListField(child=serializers.IntegerField()),
+        lambda: serializers.DecimalField(max_digits=10, decimal_places=2),
+    )
+
+    levels = [[] for _ in range(depth)]
+    classes = []
+    for index in range(count):
+        level = index % depth
+        attrs = {
+            'field_{}'.format(field): field_factories[field % len(field_factories)]()
+            for field in range(field_count)
+        }
+        lower = levels[level - 1] if level else []
+        if lower:
+            attrs['nested'] = lower[index % len(lower)]()
+            attrs['nested_list'] = lower[(index + 1) % len(lower)](many=True)
+        serializer_class = type('Serializer{}'.format(index), (serializers.Serializer,), attrs)
+        levels[level].append(serializer_class)
+        classes.append(serializer_class)
+    return classes
+
+
+def make_urlconf(endpoint_count, serializer_classes):
+    """
+    Return a URLconf module with ``endpoint_count`` endpoints: three out of four are API views using
+    versioned serializers through :code:`view_config`, the others are paginated list viewsets.
+    """
+    from django.conf.urls import url
+    from rest_framework import mixins, permissions, viewsets
+    from rest_framework.pagination import PageNumberPagination
+    from rest_framework.response import Response
+    from rest_framework.views import APIView
+
+    from drf_openapi.utils import view_config
+    from drf_openapi.views import SchemaView
+
+    # Also runs against older trees, to compare with them
+    try:
+        from drf_openapi.cache import SchemaCache
+    except ImportError:
+        # SchemaView generates the schema on every request
+        SchemaCache = None
+    try:
+        from drf_openapi.versioning import VersionedSerializers
+    except ImportError:
+        from drf_openapi.entities import VersionedSerializers
+
+    prefix = r'^v(?P<version>[0-9]+\.[0-9]+)/'
+    patterns = []
+    for index in range(endpoint_count):
+        first = serializer_classes[index % len(serializer_classes)]
+        second = serializer_classes[(index + 1) % len(serializer_classes)]
+        if index % 4 == 3:
+            view = type('ListViewSet{}'.format(index), (mixins.ListModelMixin, viewsets.GenericViewSet), {
+                'serializer_class': first,
+                'pagination_class': PageNumberPagination,
+                'permission_classes': (permissions.AllowAny,),
+            }).as_view({'get': 'list'})
+        else:
+            versioned = type('VersionedSerializer{}'.format(index), (VersionedSerializers,), {
+                '__doc__': 'Changelog of resource {}'.format(index),
+                'VERSION_MAP': (('>=1.0, <2.0', first), ('>=2.0', second)),
+            })
+
+            @view_config(response_serializer=versioned)
+            def get(self, request, version):
+                """Retrieve the resource."""
+                return Response({})
+
+            @view_config(request_serializer=versioned, response_serializer=versioned)
+            def post(self, request, version):
+                """Create the resource."""
+                return Response({})
+
+            view = type('ResourceView{}'.format(index), (APIView,), {
+                'get': get,
+                'post': post,
+                'permission_classes': (permissions.AllowAny,),
+            }).as_view()
+        patterns.append(url(prefix + 'resource{}/$'.format(index), view))
+
+    class ColdSchemaView(SchemaView):
+        permission_classes = (permissions.AllowAny,)
+        schema_cache = None
+
+    class CachedSchemaView(SchemaView):
+        permission_classes = (permissions.AllowAny,)
+        if SchemaCache is not None:
+            schema_cache = SchemaCache()
+
+    patterns.append(url(prefix + 'schema/$', ColdSchemaView.as_view(), name='schema_cold'))
+    patterns.append(url(prefix + 'schema/cached/$', CachedSchemaView.as_view(), name='schema_cached'))
+
+    urlconf = types.ModuleType('bench_urls_{}'.format(endpoint_count))
+    urlconf.urlpatterns = patterns
+    sys.modules[urlconf.__name__] = urlconf
+    return urlconf
+
+
+def measure(func, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'best': min(times),
+        'median': statistics.median(times),
+        'peak_memory': peak_memory,
+    }, result
+
+
+def run_scenario(endpoint_count, serializer_count, field_count, depth, repeat):
+    from django.test import Client, override_settings
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from drf_openapi.codec import OpenAPICodec, OpenAPIRenderer
+    from drf_openapi.entities import OpenApiSchemaGenerator
+
+    serializer_classes = make_serializers(serializer_count, field_count, depth)
+    urlconf = make_urlconf(endpoint_count, serializer_classes)
+    version = VERSIONS[-1]
+    results = {}
+
+    # Older trees take the version from the request rather than from the generator
+    request = Request(APIRequestFactory().get('/v{}/'.format(version)))
+    request.version = version
+
+    def get_schema():
+        generator = OpenApiSchemaGenerator(version=version, title='Benchmark', urlconf=urlconf)
+        return generator.get_schema(request=request)
+
+    results['get_schema'], document = measure(get_schema, repeat)
+
+    def get_response_objects():
+        generator = OpenApiSchemaGenerator(version=version, urlconf=urlconf)
+        for serializer_class in serializer_classes:
+            generator.get_response_object(serializer_class, None)
+
+    results['get_response_object'], _ = measure(get_response_objects, repeat)
+
+    renderer = OpenAPIRenderer()
+    if hasattr(renderer, 'encode'):
+        encode = renderer.encode
+    else:
+        # Older trees only encode from render
+        def encode(document):
+            return OpenAPICodec().encode(document, extra=renderer.get_customizations())
+
+    results['encode'], content = measure(lambda: encode(document), repeat)
+    results['encode']['size'] = len(content)
+
+    with override_settings(ROOT_URLCONF=urlconf.__name__):
+        client = Client()
+        schema_url = '/v{}/schema/?format=openapi'.format(version)
+        results['view_cold'], response = measure(lambda: client.get(schema_url), repeat)
+        results['view_cold']['size'] = len(response.content)
+
+        cached_url = '/v{}/schema/cached/?format=openapi'.format(version)
+        client.get(cached_url)
+        results['view_cached'], response = measure(lambda: client.get(cached_url), repeat)
+        results['view_cached']['size'] = len(response.content)
+
+    return results
+
+
+def get_environment():
+    import django
+    import rest_framework
+
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'rest_framework': rest_framework.VERSION,
+    }
+
+
+def compare(results, previous):
+    """Print the median time and peak memory ratios of ``results`` against ``previous`` results."""
+    print('\nCompared with {}:'.format(previous['environment']['commit']))
+    for name, stages in results['scenarios'].items():
+        previous_stages = previous['scenarios'].get(name)
+        if previous_stages is None:
+            continue
+        for stage, result in stages.items():
+            before = previous_stages.get(stage)
+            if before is None:
+                continue
+            print('{:<24} {:<20} time x{:.2f}  memory x{:.2f}'.format(
+                name, stage,
+                result['median'] / before['median'] if before['median'] else float('nan'),
+                result['peak_memory'] / before['peak_memory'] if before['peak_memory'] else float('nan')))
+
+
+def parse_setting(value):
+    key, _, raw = value.partition('=')
+    try:
+        return key, json.loads(raw)
+    except ValueError:
+        return key, raw
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoints', default='50,200', help='Comma-separated numbers of endpoints to benchmark')
+    parser.add_argument('--serializers', type=int, default=40, help='Number of serializers')
+    parser.add_argument('--fields', type=int, default=8, help='Plain fields per serializer')
+    parser.add_argument('--depth', type=int, default=3, help='Nesting depth of the serializers')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per stage')
+    parser.add_argument('--setting', action='append', default=[], type=parse_setting,
+                        help='DRF_OPENAPI setting as KEY=VALUE (JSON value), may be repeated')
+    parser.add_argument('--output', help='File to write the results to, as JSON')
+    parser.add_argument('--compare', help='Earlier results file to compare with')
+    args = parser.parse_args(argv)
+
+    configure(dict(args.setting))
+
+    results = {
+        'environment': get_environment(),
+        'parameters': {
+            'serializers': args.serializers,
+            'fields': args.fields,
+            'depth': args.depth,
+            'repeat': args.repeat,
+            'settings': dict(args.setting),
+        },
+        'scenarios': {},
+    }
+
+    for endpoint_count in [int(count) for count in args.endpoints.split(',')]:
+        name = '{}_endpoints'.format(endpoint_count)
+        stages = run_scenario(endpoint_count, args.serializers, args.fields, args.depth, args.repeat)
+        results['scenarios'][name] = stages
+        for stage, result in stages.items():
+            print('{:<24} {:<20} best {:8.4f}s  median {:8.4f}s  peak {:10,d}B{}'.format(
+                name, stage, result['best'], result['median'], result['peak_memory'],
+                '  size {:,d}B'.format(result['size']) if 'size' in result else ''))
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as previous_file:
+            compare(results, json.load(previous_file))
+
+
+if __name__ == '__main__':
+    main()
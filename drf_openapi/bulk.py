@@ -0,0 +1,404 @@
+# coding=utf-8
+"""Bulk validation of lists of payloads.
+
+``ListSerializer`` validates a list by running its child serializer on each item, which runs each of its fields.
+The subclass returned by :code:`bulk_serializer` validates the lists given to its ``many=True`` instances one field at a
+time instead, across every item: required keys, types, lengths, bounds and choices of the values of common fields are
+checked over the whole column of the field in one loop, and the values of nested serializers and lists are validated
+as columns of their own. Values failing those checks, of other fields, and custom validators, ``validate_<field>``
+and ``validate`` methods go through the serializer and its fields item by item, so that the validated data and
+the errors of each item are those the standard path returns.
+"""
+import sys
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import MaxLengthValidator, MaxValueValidator, MinLengthValidator, MinValueValidator
+from rest_framework import fields, serializers
+from rest_framework.compat import ProhibitNullCharactersValidator
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import SkipField, empty, get_error_detail, set_value
+from rest_framework.settings import api_settings
+from rest_framework.utils import html
+
+from drf_openapi.introspection import get_function, keeps_method
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+
+if sys.version_info[0] >= 3:
+    text_type, integer_types = str, (int,)
+else:
+    text_type, integer_types = unicode, (int, long)  # noqa: F821
+
+# Marks values of skipped fields
+SKIP = object()
+
+# get_value methods reading the value of the field name from dictionaries that aren't HTML form data
+_PLAIN_GET_VALUES = frozenset(get_function(cls, 'get_value') for cls in (
+    fields.Field, fields.MultipleChoiceField, fields.ListField, fields.DictField, fields.JSONField,
+    serializers.Serializer, serializers.ListSerializer))
+
+_LIST_TO_INTERNAL_VALUE = get_function(serializers.ListSerializer, 'to_internal_value')
+
+_STRING_TYPES = frozenset((text_type, float) + integer_types)
+_NUMBER_TYPES = frozenset((float,) + integer_types)
+_CHOICE_TYPES = frozenset((text_type, float, bool) + integer_types)
+
+_bulk_serializers = {}
+
+
+class _Validators(object):
+    """The limits of the built-in validators of a field, checked over whole columns, and whether it has others."""
+
+    def __init__(self, validators):
+        self.max_length = self.min_length = self.max_value = self.min_value = None
+        self.null_characters = False
+        self.custom = False
+        for validator in validators:
+            cls = validator.__class__
+            limit = getattr(validator, 'limit_value', None)
+            if callable(limit):
+                self.custom = True
+            elif cls is MaxLengthValidator:
+                self.max_length = limit if self.max_length is None else min(self.max_length, limit)
+            elif cls is MinLengthValidator:
+                self.min_length = limit if self.min_length is None else max(self.min_length, limit)
+            elif cls is MaxValueValidator:
+                self.max_value = limit if self.max_value is None else min(self.max_value, limit)
+            elif cls is MinValueValidator:
+                self.min_value = limit if self.min_value is None else max(self.min_value, limit)
+            elif ProhibitNullCharactersValidator is not None and cls is ProhibitNullCharactersValidator:
+                self.null_characters = True
+            else:
+                self.custom = True
+        self.limited = (self.max_length, self.min_length, self.max_value, self.min_value) != (None,) * 4 or (
+            self.null_characters)
+
+    def accepts(self, value):
+        """Whether ``value`` passes the built-in validators."""
+        if self.max_length is not None and len(value) > self.max_length:
+            return False
+        if self.min_length is not None and len(value) < self.min_length:
+            return False
+        if self.max_value is not None and value > self.max_value:
+            return False
+        if self.min_value is not None and value < self.min_value:
+            return False
+        return not (self.null_characters and '\x00' in text_type(value))
+
+
+def _run_validation(field, value, django_errors):
+    """Return the ``(validated value, error)`` of ``value`` validated by ``field`` itself."""
+    try:
+        return field.run_validation(value), None
+    except ValidationError as exc:
+        return None, exc.detail
+    except SkipField:
+        return SKIP, None
+    except DjangoValidationError as exc:
+        # Only serializers catch the Django errors of their fields
+        if not django_errors:
+            raise
+        return None, get_error_detail(exc)
+
+
+def _is_plain_list(value):
+    return value.__class__ is list
+
+
+def _is_plain_mapping(value):
+    return isinstance(value, Mapping) and not html.is_html_input(value)
+
+
+def _convert_strings(field, values):
+    trim = field.trim_whitespace
+    for index, value in values:
+        if value.__class__ not in _STRING_TYPES or value.__class__ is bool:
+            continue
+        value = text_type(value)
+        stripped = value.strip()
+        if not stripped:
+            # Blank, left to allow_blank
+            continue
+        yield index, stripped if trim else value
+
+
+def _convert_integers(field, values):
+    for index, value in values:
+        if value.__class__ in integer_types and value.__class__ is not bool:
+            yield index, value
+
+
+def _convert_floats(field, values):
+    for index, value in values:
+        if value.__class__ in _NUMBER_TYPES and value.__class__ is not bool:
+            yield index, float(value)
+
+
+def _convert_booleans(field, values):
+    for index, value in values:
+        if value is True or value is False:
+            yield index, value
+
+
+def _convert_choices(field, values):
+    choices = field.choice_strings_to_values
+    for index, value in values:
+        if value.__class__ in _CHOICE_TYPES and value != '':
+            key = text_type(value)
+            if key in choices:
+                yield index, choices[key]
+
+
+def _get_converter(field):
+    """Return the function converting the values of ``field`` it accepts as they are, ``None`` if it has none."""
+    cls = field.__class__
+    if isinstance(field, fields.CharField):
+        if (keeps_method(cls, fields.CharField, 'run_validation') and
+                keeps_method(cls, fields.CharField, 'to_internal_value')):
+            return _convert_strings
+        return None
+    if not keeps_method(cls, fields.Field, 'run_validation'):
+        return None
+    for base, converter in ((fields.IntegerField, _convert_integers), (fields.FloatField, _convert_floats),
+                            (fields.BooleanField, _convert_booleans), (fields.ChoiceField, _convert_choices)):
+        if isinstance(field, base) and keeps_method(cls, base, 'to_internal_value'):
+            return converter
+    return None
+
+
+def _validate_values(field, values, results, errors, django_errors):
+    """Validate the ``(index, value)`` pairs of the non-null ``values`` of a scalar field."""
+    converter = _get_converter(field)
+    validators = _Validators(field.validators)
+    pending = dict(values)
+    if converter is not None:
+        for index, value in converter(field, values):
+            if validators.limited and not validators.accepts(value):
+                continue
+            del pending[index]
+            if validators.custom:
+                try:
+                    field.run_validators(value)
+                except ValidationError as exc:
+                    errors[index] = exc.detail
+                    continue
+            results[index] = value
+
+    for index, value in pending.items():
+        results[index], errors[index] = _run_validation(field, value, django_errors)
+
+
+def _validate_lists(field, values, results, errors, django_errors):
+    """Validate the ``(index, value)`` pairs of the non-null ``values`` of a ``ListField`` or ``ListSerializer``."""
+    many = isinstance(field, serializers.ListSerializer)
+    items = []
+    lists = []
+    for index, value in values:
+        if _is_plain_list(value) and (value or field.allow_empty):
+            lists.append((index, value, len(items), len(items) + len(value)))
+            items.extend(value)
+        else:
+            results[index], errors[index] = _run_validation(field, value, django_errors)
+
+    try:
+        validated_items, item_errors = validate_column(field.child, items, django_errors=False)
+    except DjangoValidationError:
+        # Raised by the child of a ListField, which fails the whole list: validate each list by itself
+        for index, data, _, _ in lists:
+            results[index], errors[index] = _run_validation(field, data, django_errors)
+        return
+    if many:
+        custom = bool(field.validators) or not keeps_method(field.__class__, serializers.ListSerializer, 'validate')
+    else:
+        validators = _Validators(field.validators)
+    for index, data, start, end in lists:
+        if any(error is not None for error in item_errors[start:end]):
+            if many:
+                errors[index] = ValidationError([error or {} for error in item_errors[start:end]]).detail
+            else:
+                errors[index] = ValidationError(OrderedDict(
+                    (position, error) for position, error in enumerate(item_errors[start:end])
+                    if error is not None)).detail
+            continue
+
+        value = validated_items[start:end]
+        if many:
+            if custom:
+                try:
+                    field.run_validators(value)
+                    value = field.validate(value)
+                    assert value is not None, '.validate() should return the validated data'
+                except (ValidationError, DjangoValidationError) as exc:
+                    errors[index] = ValidationError(detail=serializers.as_serializer_error(exc)).detail
+                    continue
+        elif validators.limited and not validators.accepts(value):
+            results[index], errors[index] = _run_validation(field, data, django_errors)
+            continue
+        elif validators.custom:
+            try:
+                field.run_validators(value)
+            except ValidationError as exc:
+                errors[index] = exc.detail
+                continue
+        results[index] = value
+
+
+def _validate_serializers(serializer, values, results, errors, django_errors):
+    """Validate the ``(index, value)`` pairs of the non-null ``values`` of a nested serializer."""
+    rows = []
+    for index, value in values:
+        if _is_plain_mapping(value):
+            rows.append((index, value))
+        else:
+            results[index], errors[index] = _run_validation(serializer, value, django_errors)
+    validated_rows, row_errors = validate_rows(serializer, [row for _, row in rows])
+    for (index, _), value, error in zip(rows, validated_rows, row_errors):
+        results[index], errors[index] = value, error
+
+
+def _get_column_validator(field):
+    """Return the function validating the non-null values of ``field``, by the methods ``field`` keeps."""
+    cls = field.__class__
+    if isinstance(field, serializers.Serializer):
+        if keeps_method(cls, serializers.Serializer, 'run_validation') and (
+                keeps_method(cls, serializers.Serializer, 'to_internal_value')):
+            return _validate_serializers
+    elif isinstance(field, serializers.ListSerializer):
+        if keeps_method(cls, serializers.ListSerializer, 'run_validation') and (
+                get_function(cls, 'to_internal_value') in (_LIST_TO_INTERNAL_VALUE, _to_internal_value)):
+            return _validate_lists
+    elif isinstance(field, fields.ListField):
+        if (keeps_method(cls, fields.Field, 'run_validation') and
+                keeps_method(cls, fields.ListField, 'to_internal_value') and
+                keeps_method(cls, fields.ListField, 'run_child_validation')):
+            return _validate_lists
+    return _validate_values
+
+
+def validate_column(field, values, django_errors=True):
+    """
+    Validate each of ``values`` like ``field.run_validation`` does, one kind of check at a time over all of them.
+    Return the list of validated values, with ``SKIP`` for skipped fields, and the list of their errors,
+    ``None`` for valid values.
+    """
+    results = [None] * len(values)
+    errors = [None] * len(values)
+    present = []
+    for index, value in enumerate(values):
+        if value is empty or value is None:
+            # Required, default and null values
+            results[index], errors[index] = _run_validation(field, value, django_errors)
+        else:
+            present.append((index, value))
+
+    _get_column_validator(field)(field, present, results, errors, django_errors)
+    return results, errors
+
+
+def validate_rows(serializer, rows):
+    """
+    Validate each of the dictionaries ``rows`` like ``serializer.run_validation`` does, one field at a time.
+    Return the list of validated data, ``None`` for invalid rows, and the list of their errors, ``None`` for valid rows.
+    """
+    validated = [OrderedDict() for _ in rows]
+    field_errors = [None] * len(rows)
+    for field in serializer._writable_fields:
+        name = field.field_name
+        if get_function(field.__class__, 'get_value') in _PLAIN_GET_VALUES:
+            column = [row.get(name, empty) for row in rows]
+        else:
+            column = [field.get_value(row) for row in rows]
+        values, errors = validate_column(field, column)
+
+        validate_method = getattr(serializer, 'validate_' + name, None)
+        source_attrs = field.source_attrs
+        for index, value in enumerate(values):
+            error = errors[index]
+            if error is None:
+                if value is SKIP:
+                    continue
+                if validate_method is not None:
+                    try:
+                        value = validate_method(value)
+                    except ValidationError as exc:
+                        error = exc.detail
+                    except DjangoValidationError as exc:
+                        error = get_error_detail(exc)
+                if error is None:
+                    set_value(validated[index], source_attrs, value)
+                    continue
+            if field_errors[index] is None:
+                field_errors[index] = OrderedDict()
+            field_errors[index][name] = error
+
+    results = [None] * len(rows)
+    errors = [None] * len(rows)
+    custom = bool(serializer.validators) or not keeps_method(serializer.__class__, serializers.Serializer, 'validate')
+    for index, value in enumerate(validated):
+        if field_errors[index] is not None:
+            errors[index] = ValidationError(field_errors[index]).detail
+            continue
+        if custom:
+            try:
+                serializer.run_validators(value)
+                value = serializer.validate(value)
+                assert value is not None, '.validate() should return the validated data'
+            except (ValidationError, DjangoValidationError) as exc:
+                errors[index] = ValidationError(detail=serializers.as_serializer_error(exc)).detail
+                continue
+        results[index] = value
+    return results, errors
+
+
+def _to_internal_value(self, data):
+    """``ListSerializer.to_internal_value``, validating the items column by column."""
+    if html.is_html_input(data):
+        data = html.parse_html_list(data, default=[])
+
+    if not isinstance(data, list):
+        message = self.error_messages['not_a_list'].format(input_type=type(data).__name__)
+        raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='not_a_list')
+
+    if not self.allow_empty and len(data) == 0:
+        if self.parent and self.partial:
+            raise SkipField()
+        raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [self.error_messages['empty']]}, code='empty')
+
+    results, errors = validate_column(self.child, data, django_errors=False)
+    if any(error is not None for error in errors):
+        raise ValidationError([error or {} for error in errors])
+    return results
+
+
+def bulk_serializer(serializer_class):
+    """
+    Return the subclass of ``serializer_class`` whose ``many=True`` instances validate lists column by column,
+    or ``serializer_class`` itself when its list serializer overrides ``to_internal_value``.
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    list_serializer_class = getattr(meta, 'list_serializer_class', serializers.ListSerializer)
+    if not issubclass(serializer_class, serializers.Serializer) or not keeps_method(
+            list_serializer_class, serializers.ListSerializer, 'to_internal_value'):
+        return serializer_class
+
+    bulk = _bulk_serializers.get(serializer_class)
+    if bulk is None:
+        bulk_list_serializer_class = type(list_serializer_class)(
+            list_serializer_class.__name__, (list_serializer_class,), {
+                '__module__': list_serializer_class.__module__,
+                'to_internal_value': _to_internal_value,
+            })
+        bulk_meta = type('Meta', (meta,) if meta is not None else (object,), {
+            'list_serializer_class': bulk_list_serializer_class,
+        })
+        bulk = _bulk_serializers[serializer_class] = type(serializer_class)(
+            serializer_class.__name__, (serializer_class,), {
+                '__module__': serializer_class.__module__,
+                '__doc__': serializer_class.__doc__,
+                'Meta': bulk_meta,
+            })
+    return bulk
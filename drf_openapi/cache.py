@@ -0,0 +1,366 @@
+# coding=utf-8
+"""In-process cache of generated schema documents.
+
+Generating a schema enumerates every endpoint, instantiates every view and introspects every serializer,
+so :code:`SchemaView` keeps the result keyed on the version and the request-dependent inputs
+and only rebuilds it once it expires, gets evicted or is explicitly invalidated.
+Concurrent requests for the same missing schema wait for a single generation, and expired schemas may be served
+while they get regenerated.
+"""
+import hashlib
+import logging
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+
+from drf_openapi.codec import HostIndependentSchema
+from drf_openapi.fingerprint import get_schema_fingerprint
+from drf_openapi.settings import openapi_settings
+
+logger = logging.getLogger(__name__)
+
+# Sentinel meaning "use the value from the DRF_OPENAPI settings"
+DEFAULT = object()
+
+# Seconds between two checks of a lock held by another process
+LOCK_POLL_INTERVAL = 0.1
+
+
+class CachedSchema(object):
+    """A generated schema document, the time it was built and its encoded forms."""
+
+    def __init__(self, document, created=None):
+        self.document = document
+        # The document may be dropped once encoded, see IMMUTABLE_SCHEMAS
+        self.empty = document is None
+        self.created = time.time() if created is None else created
+        self._encoded = {}
+        # Held while encoding, so that the document is encoded once and only dropped once encoded
+        self._lock = threading.Lock()
+
+    def get_encoded_for_url(self, renderer, url, timer=None):
+        """
+        Return the :code:`EncodedSchema` produced by ``renderer`` for this document served from ``url``.
+        The document is only encoded once, without host, and the host of each URL is spliced into it.
+        """
+        return self.get_host_independent(renderer, timer=timer).for_url(
+            url, copy=not openapi_settings.IMMUTABLE_SCHEMAS)
+
+    def get_host_independent(self, renderer, timer=None):
+        """Return the :code:`HostIndependentSchema` produced by ``renderer`` for this document."""
+        key = (renderer.__class__, 'host_independent')
+        host_independent = self._encoded.get(key)
+        if host_independent is not None:
+            return host_independent
+        with self._lock:
+            # Encoded by another thread in the meantime
+            host_independent = self._encoded.get(key)
+            if host_independent is None:
+                host_independent = renderer.encode_host_independent(self.document, timer=timer)
+                host_independent.last_modified = self.created
+                self._encoded[key] = host_independent
+                if openapi_settings.IMMUTABLE_SCHEMAS:
+                    # Only the encoded bytes are served from now on
+                    self.document = None
+        return host_independent
+
+
+class SchemaCache(object):
+    """Thread-safe, size-bounded LRU cache with per-entry expiry.
+
+    Keys are tuples whose first element is the API version, which lets :code:`invalidate`
+    drop every schema of a given version at once.
+    """
+
+    def __init__(self, timeout=DEFAULT, max_entries=DEFAULT, stale_timeout=DEFAULT):
+        self._timeout = timeout
+        self._max_entries = max_entries
+        self._stale_timeout = stale_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        # key -> lock held while generating the schema of that key
+        self._generating = {}
+        self._refreshing = set()
+
+    @property
+    def timeout(self):
+        if self._timeout is DEFAULT:
+            return openapi_settings.SCHEMA_CACHE_TIMEOUT
+        return self._timeout
+
+    @property
+    def max_entries(self):
+        if self._max_entries is DEFAULT:
+            return openapi_settings.SCHEMA_CACHE_MAX_ENTRIES
+        return self._max_entries
+
+    @property
+    def stale_timeout(self):
+        if self._stale_timeout is DEFAULT:
+            return openapi_settings.SCHEMA_CACHE_STALE_TIMEOUT
+        return self._stale_timeout
+
+    def _is_expired(self, entry, now):
+        timeout = self.timeout
+        return timeout is not None and now - entry.created >= timeout
+
+    def _is_servable_stale(self, entry, now):
+        stale_timeout = self.stale_timeout
+        if stale_timeout is None:
+            return True
+        return bool(stale_timeout) and now - entry.created < self.timeout + stale_timeout
+
+    def get(self, key):
+        """Return the :code:`CachedSchema` stored under ``key`` or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._is_expired(entry, time.time()):
+                del self._entries[key]
+                return None
+            # Mark as most recently used
+            self._entries.pop(key)
+            self._entries[key] = entry
+            return entry
+
+    def set(self, key, document):
+        """Store ``document`` under ``key`` and return the new :code:`CachedSchema`."""
+        entry = CachedSchema(document)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            max_entries = self.max_entries
+            while max_entries is not None and len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_or_create(self, key, generate, refresh=None):
+        """
+        Return the :code:`CachedSchema` stored under ``key``, storing the document returned by ``generate()``
+        if there is none. Only one caller at a time generates the document of a key, the others wait for it.
+        An expired schema within the SCHEMA_CACHE_STALE_TIMEOUT is returned as is while it gets regenerated:
+        by ``refresh()`` in a background thread, which must not depend on the request of the caller,
+        or without ``refresh`` by the first caller finding it expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            stale = False
+            if entry is not None:
+                now = time.time()
+                if not self._is_expired(entry, now):
+                    # Mark as most recently used, without checking its expiry again
+                    self._entries.pop(key)
+                    self._entries[key] = entry
+                    return entry
+                if self._is_servable_stale(entry, now):
+                    if refresh is not None:
+                        self._refresh(key, refresh)
+                        return entry
+                    if key in self._refreshing:
+                        return entry
+                    self._refreshing.add(key)
+                    stale = True
+            if not stale:
+                generating = self._generating.setdefault(key, threading.Lock())
+
+        if stale:
+            # Regenerated by this caller while the others keep getting the expired schema
+            try:
+                return self.set(key, generate())
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        with generating:
+            try:
+                # Generated by another caller in the meantime
+                entry = self.get(key)
+                if entry is None:
+                    entry = self.set(key, generate())
+            finally:
+                with self._lock:
+                    if self._generating.get(key) is generating:
+                        del self._generating[key]
+        return entry
+
+    def _refresh(self, key, generate):
+        """Regenerate the document of ``key`` in a background thread, unless it already is."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.set(key, generate())
+            except Exception:
+                logger.exception('Failed to regenerate the schema %r', key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+                # Database connections are per thread, release the ones this thread opened
+                from django.db import connections
+                connections.close_all()
+
+        thread = threading.Thread(target=refresh, name='drf-openapi-refresh')
+        thread.daemon = True
+        thread.start()
+
+    def invalidate(self, version=None):
+        """Drop the cached schemas of ``version``, or every cached schema when no version is given."""
+        with self._lock:
+            if version is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == version]:
+                del self._entries[key]
+
+    def clear(self):
+        self.invalidate()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedSchemaCache(object):
+    """Encoded schemas shared by every process through a Django cache, stored compressed.
+
+    Keys include the fingerprint of the endpoints, views and serializers of the version,
+    so that processes running different code never share schemas.
+    Schemas read from the Django cache are also kept in-process, like generated ones.
+    """
+
+    def __init__(self, alias=DEFAULT, timeout=DEFAULT):
+        self._alias = alias
+        self._timeout = timeout
+        self._loaded = SchemaCache()
+        self._fingerprints = {}
+
+    @property
+    def alias(self):
+        if self._alias is DEFAULT:
+            return openapi_settings.SHARED_SCHEMA_CACHE
+        return self._alias
+
+    @property
+    def timeout(self):
+        if self._timeout is DEFAULT:
+            return openapi_settings.SHARED_SCHEMA_CACHE_TIMEOUT
+        return self._timeout
+
+    def __bool__(self):
+        return self.alias is not None
+    __nonzero__ = __bool__
+
+    def get_fingerprint(self, version):
+        fingerprint = self._fingerprints.get(version)
+        if fingerprint is None:
+            fingerprint = self._fingerprints[version] = get_schema_fingerprint(version)
+        return fingerprint
+
+    def make_key(self, key, renderer_class):
+        """Return the Django cache key of the schema stored under ``key`` (whose first element is the version)."""
+        parts = (
+            self.get_fingerprint(key[0]), key, renderer_class.__module__, renderer_class.__name__,
+            openapi_settings.COMPACT_JSON, openapi_settings.JSON_ENCODER, openapi_settings.USE_DEFINITIONS,
+        )
+        return 'drf_openapi:schema:{}'.format(hashlib.sha1(repr(parts).encode('utf-8')).hexdigest())
+
+    def get(self, key, renderer_class):
+        """Return the :code:`HostIndependentSchema` stored under ``key`` for ``renderer_class``, or ``None``."""
+        from django.core.cache import caches
+
+        cache_key = self.make_key(key, renderer_class)
+        loaded = self._loaded.get((key[0], cache_key))
+        if loaded is not None:
+            return loaded.document
+
+        stored = caches[self.alias].get(cache_key)
+        if stored is None:
+            return None
+        schema = HostIndependentSchema(
+            zlib.decompress(stored['content']), stored['header'], compact=stored['compact'],
+            encoder=stored['encoder'], spliced_keys=stored['spliced_keys'], last_modified=stored['last_modified'])
+        self._loaded.set((key[0], cache_key), schema)
+        return schema
+
+    def set(self, key, renderer_class, schema):
+        from django.core.cache import caches
+
+        cache_key = self.make_key(key, renderer_class)
+        caches[self.alias].set(cache_key, {
+            'content': zlib.compress(schema.content),
+            'header': schema.header,
+            'compact': schema.compact,
+            'encoder': schema.encoder,
+            'spliced_keys': schema.spliced_keys,
+            'last_modified': schema.last_modified,
+        }, self.timeout)
+        self._loaded.set((key[0], cache_key), schema)
+
+    def lock(self, key, renderer_class):
+        """Return the lock held by the process generating the schema of ``key``, as set by SCHEMA_LOCK_CACHE."""
+        return cross_process_lock(self.make_key(key, renderer_class))
+
+    def invalidate(self, version=None):
+        """
+        Drop the schemas of ``version``, or of every version, read by this process.
+        The Django cache keeps them until they expire, or the fingerprint of the version changes.
+        """
+        self._loaded.invalidate(version)
+        if version is None:
+            self._fingerprints.clear()
+        else:
+            self._fingerprints.pop(version, None)
+
+
+class _CrossProcessLock(object):
+    """
+    Lock shared by every process using the Django cache ``alias``, held for ``timeout`` seconds at most.
+    Acquiring gives up waiting after ``timeout`` seconds too, so a crashed holder can't block generation forever.
+    """
+
+    def __init__(self, alias, key, timeout):
+        self.alias = alias
+        self.key = 'drf_openapi:lock:{}'.format(hashlib.sha1(repr(key).encode('utf-8')).hexdigest())
+        self.timeout = timeout
+        self._token = uuid.uuid4().hex
+
+    def __enter__(self):
+        from django.core.cache import caches
+        self._cache = caches[self.alias]
+        deadline = time.time() + self.timeout
+        while not self._cache.add(self.key, self._token, self.timeout):
+            if time.time() >= deadline:
+                logger.warning('Gave up waiting for the schema lock %s', self.key)
+                break
+            time.sleep(LOCK_POLL_INTERVAL)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Don't release a lock that expired and was taken over by another process
+        if self._cache.get(self.key) == self._token:
+            self._cache.delete(self.key)
+
+
+class _NoLock(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+def cross_process_lock(key):
+    """Return the lock held by the process generating the schema of ``key``, as set by SCHEMA_LOCK_CACHE."""
+    if openapi_settings.SCHEMA_LOCK_CACHE is None:
+        return _NoLock()
+    return _CrossProcessLock(openapi_settings.SCHEMA_LOCK_CACHE, key, openapi_settings.SCHEMA_LOCK_TIMEOUT)
+
+
+schema_cache = SchemaCache()
+shared_schema_cache = SharedSchemaCache()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Console script for drf_openapi."""
+import os
+import sys
+
+import click
+
+
+@click.group()
+@click.option('--settings', envvar='DJANGO_SETTINGS_MODULE', required=True,
+              help='Python path of the Django settings module of the project.')
+@click.option('--pythonpath', type=click.Path(exists=True, file_okay=False),
+              help='Directory to add to the Python path, e.g. the root of the project.')
+def main(settings, pythonpath):
+    """Tools for the OpenAPI schema of a Django Rest Framework project."""
+    if pythonpath:
+        sys.path.insert(0, os.path.abspath(pythonpath))
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings
+
+    import django
+    django.setup()
+
+
+@main.command()
+@click.option('--api-version', 'versions', multiple=True,
+              help='Version to build, may be repeated. Defaults to every configured version.')
+@click.option('--output-dir', type=click.Path(file_okay=False),
+              help='Directory to write the schemas to. Defaults to the SCHEMA_DIR setting.')
+@click.option('--url', help='Base URL of the API, sets the host and scheme of the schemas.')
+@click.option('--title', help='Title of the schemas.')
+@click.option('--processes', type=int, help='Number of worker processes.')
+def build(versions, output_dir, url, title, processes):
+    """Prebuild the schema of every API version as minified and gzipped JSON files."""
+    from django.core.management import call_command
+
+    options = {'versions': list(versions) or None, 'url': url, 'processes': processes}
+    if output_dir:
+        options['output_dir'] = output_dir
+    if title:
+        options['title'] = title
+    call_command('build_openapi_schema', **options)
+
+
+@main.command()
+@click.option('--api-version', 'versions', multiple=True,
+              help='Version to profile, may be repeated. Defaults to every configured version.')
+@click.option('--url', help='Base URL of the API, sets the host and scheme of the schemas.')
+@click.option('--title', help='Title of the schemas.')
+@click.option('--sort', type=click.Choice(['time', 'bytes', 'serializer_instances']), default='time',
+              help='Cost to sort the endpoints by.')
+@click.option('--limit', type=int, help='Number of endpoints to report.')
+@click.option('--json', 'as_json', is_flag=True, help='Output the report as JSON.')
+def profile(versions, url, title, sort, limit, as_json):
+    """Report the generation time, serializer instantiations and size of each endpoint of the schemas."""
+    from django.core.management import call_command
+
+    options = {'versions': list(versions) or None, 'url': url, 'sort': sort, 'limit': limit, 'json': as_json}
+    if title:
+        options['title'] = title
+    call_command('profile_openapi_schema', **options)
+
+
+@main.command()
+@click.option('--api-version', 'versions', multiple=True,
+              help='Version to fingerprint, may be repeated. Defaults to every configured version.')
+@click.option('--output', type=click.Path(dir_okay=False), help='File to write the fingerprints to, as JSON.')
+@click.option('--check', type=click.Path(exists=True, dir_okay=False),
+              help='File of earlier fingerprints to compare with, fails listing the endpoints that changed.')
+def fingerprint(versions, output, check):
+    """Print the fingerprint of the schemas, or check them for drift against earlier fingerprints."""
+    from django.core.management import call_command
+
+    call_command('openapi_fingerprint', versions=list(versions) or None, output=output, check=check)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,13 @@
 """Adapted from https://github.com/core-api/python-openapi-codec/blob/master/openapi_codec/encode.py
 and https://github.com/marcgibbons/django-rest-swagger/blob/master/rest_framework_swagger/renderers.py
 """
-import json
+import hashlib
+import time
 from collections import OrderedDict
 
 import coreschema
 from coreapi import Document
-from coreapi.compat import urlparse, force_bytes
+from coreapi.compat import urlparse
 from openapi_codec import OpenAPICodec as _OpenAPICodec
 from openapi_codec.encode import _get_links, _get_field_description
 from openapi_codec.utils import get_method, get_encoding, get_location
@@ -16,6 +17,13 @@ from rest_framework.renderers import JSONRenderer
 from rest_framework_swagger.renderers import OpenAPIRenderer as _OpenAPIRenderer, \
     SwaggerUIRenderer as _SwaggerUIRenderer
 
+from drf_openapi.encoders import get_json_encoder
+from drf_openapi.settings import openapi_settings
+from drf_openapi.timing import NULL_TIMER
+
+# Bytes per chunk when streaming an encoded document
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class OpenApiFieldParser:
 
@@ -91,16 +99,208 @@ class OpenApiFieldParser:
         }
 
 
+class SerializerSchema(dict):
+    """Schema of a serializer class, tagged with that class
+    so that the codec can move it to the shared ``definitions`` of the document.
+    ``reference_only`` schemas stand for a serializer whose full schema is defined elsewhere (recursion).
+    """
+
+    def __init__(self, serializer_class, *args, **kwargs):
+        self.reference_only = kwargs.pop('reference_only', False)
+        super(SerializerSchema, self).__init__(*args, **kwargs)
+        self.serializer_class = serializer_class
+
+    def described(self, description):
+        """Return a copy of this schema for one particular use of the serializer."""
+        return SerializerSchema(self.serializer_class, self, description=description,
+                                reference_only=self.reference_only)
+
+
 class OpenAPICodec(_OpenAPICodec):
-    def encode(self, document, extra=None, **options):
+    def encode(self, document, extra=None, use_definitions=False, compact=None, encoder=None, timer=None,
+               url=None, **options):
+        """
+        ``compact`` and ``encoder`` (the name of a JSON encoder backend)
+        default to the COMPACT_JSON and JSON_ENCODER settings.
+        ``url`` sets the host and schemes of the document instead of the URL of ``document``, ``''`` to omit them.
+        The time spent building the OpenAPI object and encoding it to JSON is recorded in ``timer``.
+        """
+        if not isinstance(document, Document):
+            raise TypeError('Expected a `coreapi.Document` instance')
+        if timer is None:
+            timer = NULL_TIMER
+
+        with timer.phase('openapi_object'):
+            data = _generate_openapi_object(document, use_definitions=use_definitions, url=url)
+            if isinstance(extra, dict):
+                data.update(extra)
+
+        if compact is None:
+            compact = openapi_settings.COMPACT_JSON
+        with timer.phase('json_encode'):
+            return get_json_encoder(encoder)(data, compact)
+
+    def iterencode(self, document, extra=None, use_definitions=False, compact=None, encoder=None,
+                   chunk_size=STREAM_CHUNK_SIZE, url=None, **options):
+        """
+        Encode ``document`` like :code:`encode`, but yield the encoded bytes in chunks of about ``chunk_size``
+        as the paths get encoded, so that the whole encoded document never has to be held in memory.
+        """
         if not isinstance(document, Document):
             raise TypeError('Expected a `coreapi.Document` instance')
 
-        data = _generate_openapi_object(document)
-        if isinstance(extra, dict):
-            data.update(extra)
+        if compact is None:
+            compact = openapi_settings.COMPACT_JSON
+        encode = get_json_encoder(encoder)
+        item_separator, key_separator = _get_separators(encode, compact)
+
+        header = _generate_openapi_header(document, url=url)
+        extra = extra if isinstance(extra, dict) else {}
+        for key in header:
+            if key in extra:
+                header[key] = extra[key]
+
+        chunk = [encode(header, compact)[:-1], item_separator, encode('paths', compact), key_separator]
+        definitions = _Definitions() if use_definitions else None
+        if 'paths' in extra:
+            if definitions is not None:
+                # encode still collects the definitions of the generated paths
+                for _ in _iter_paths(document, definitions):
+                    pass
+            chunk.append(encode(extra['paths'], compact))
+        else:
+            chunk.append(b'{')
+            size = 0
+            for index, (url, path) in enumerate(_iter_paths(document, definitions)):
+                if index:
+                    chunk.append(item_separator)
+                item = encode(url, compact) + key_separator + encode(path, compact)
+                chunk.append(item)
+                size += len(item)
+                if size >= chunk_size:
+                    yield b''.join(chunk)
+                    chunk, size = [], 0
+            chunk.append(b'}')
+
+        # Same keys, in the same order, as the document built by encode
+        trailer = OrderedDict()
+        if definitions:
+            trailer['definitions'] = definitions.as_dict()
+        for key, value in extra.items():
+            if key not in header and key != 'paths':
+                trailer[key] = value
+        for key, value in trailer.items():
+            chunk.extend((item_separator, encode(key, compact), key_separator, encode(value, compact)))
+        chunk.append(b'}')
+        yield b''.join(chunk)
+
+    def encode_host_independent(self, document, extra=None, use_definitions=False, compact=None, encoder=None,
+                                timer=None, **options):
+        """
+        Encode ``document`` without its host and schemes, as a :code:`HostIndependentSchema`
+        in which those of each request get spliced.
+        """
+        if compact is None:
+            compact = openapi_settings.COMPACT_JSON
+        content = self.encode(
+            document, extra=extra, use_definitions=use_definitions, compact=compact, encoder=encoder, timer=timer,
+            url='')
+
+        header = _generate_openapi_header(document, url='')
+        extra = extra if isinstance(extra, dict) else {}
+        for key in header:
+            if key in extra:
+                header[key] = extra[key]
+        # Host fields set by the renderer customizations are already in the document
+        spliced_keys = tuple(key for key in ('host', 'schemes') if key not in extra)
+        return HostIndependentSchema(content, header, compact=compact, encoder=encoder, spliced_keys=spliced_keys)
+
+
+class EncodedSchema(object):
+    """An already encoded schema document along with its HTTP validators,
+    so that it can be served again without running the encoder.
+    The content may also be a list of buffers (bytes, memoryviews, mmaps) forming the document one after the other,
+    which :code:`iter_chunks` serves without ever copying the whole document at once.
+    """
+
+    def __init__(self, content, last_modified=None, content_encoding=None, etag=None):
+        self.parts = tuple(content) if isinstance(content, (list, tuple)) else (content,)
+        if etag is None:
+            hasher = hashlib.sha1()
+            for part in self.parts:
+                hasher.update(part)
+            etag = '"{}"'.format(hasher.hexdigest())
+        self.etag = etag
+        self.last_modified = time.time() if last_modified is None else last_modified
+        # e.g. 'gzip' when serving precompressed content
+        self.content_encoding = content_encoding
 
-        return force_bytes(json.dumps(data))
+    @property
+    def contiguous(self):
+        """Whether the content is held as a single bytes object."""
+        return len(self.parts) == 1 and isinstance(self.parts[0], bytes)
+
+    @property
+    def content(self):
+        if self.contiguous:
+            return self.parts[0]
+        return b''.join(self.parts)
+
+    @property
+    def size(self):
+        return sum(len(part) for part in self.parts)
+
+    def iter_chunks(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Yield the content in chunks of at most ``chunk_size`` bytes, only ever copying one chunk at a time."""
+        for part in self.parts:
+            view = memoryview(part)
+            for start in range(0, len(view), chunk_size):
+                yield view[start:start + chunk_size].tobytes()
+
+
+class HostIndependentSchema(object):
+    """An encoded schema document without host and schemes,
+    so that the same encoding serves every host the API is reached through.
+    :code:`for_url` splices the host fields of a URL into it, right after the fields of ``header``.
+    """
+
+    def __init__(self, content, header, compact=False, encoder=None, spliced_keys=('host', 'schemes'),
+                 last_modified=None):
+        self.content = content
+        self.header = header
+        self.compact = compact
+        self.encoder = encoder
+        # The fields before the host encode to the same bytes on their own
+        self.offset = len(get_json_encoder(encoder)(header, compact)) - 1
+        self.spliced_keys = spliced_keys
+        self.last_modified = time.time() if last_modified is None else last_modified
+        self._digest = hashlib.sha1(content).digest()
+
+    def get_host_fields(self, url):
+        """Return the encoded host fields of ``url``, along with the separator before them."""
+        header = OrderedDict(self.header)
+        for key, value in _generate_openapi_header(None, url=url).items():
+            if key in self.spliced_keys:
+                header[key] = value
+        if len(header) == len(self.header):
+            return b''
+        # Encoded along with the fields before them, to get the separators of the encoder
+        return get_json_encoder(self.encoder)(header, self.compact)[self.offset:-1]
+
+    def for_url(self, url, copy=True):
+        """
+        Return the :code:`EncodedSchema` of the document served from ``url``.
+        Unless ``copy``, its content is made of views over the shared content rather than a new bytes object.
+        """
+        host_fields = self.get_host_fields(url)
+        if copy:
+            content = self.content[:self.offset] + host_fields + self.content[self.offset:]
+        else:
+            view = memoryview(self.content)
+            content = [view[:self.offset], host_fields, view[self.offset:]]
+        # Derived from the hash of the shared content rather than hashing the whole document again
+        etag = '"{}"'.format(hashlib.sha1(self._digest + host_fields).hexdigest())
+        return EncodedSchema(content, last_modified=self.last_modified, etag=etag)
 
 
 class OpenAPIRenderer(_OpenAPIRenderer):
@@ -108,56 +308,105 @@ class OpenAPIRenderer(_OpenAPIRenderer):
     def render(self, data, accepted_media_type=None, renderer_context=None):
         if renderer_context['response'].status_code != status.HTTP_200_OK:
             return JSONRenderer().render(data)
+        if isinstance(data, EncodedSchema):
+            return data.content
+
+        return self.encode(data)
+
+    def encode(self, document, compact=None, timer=None, url=None):
+        extra = self.get_customizations()
+
+        return OpenAPICodec().encode(
+            document, extra=extra, use_definitions=openapi_settings.USE_DEFINITIONS, compact=compact, timer=timer,
+            url=url)
+
+    def iterencode(self, document, compact=None, url=None):
+        extra = self.get_customizations()
+
+        return OpenAPICodec().iterencode(
+            document, extra=extra, use_definitions=openapi_settings.USE_DEFINITIONS, compact=compact, url=url)
+
+    def encode_host_independent(self, document, compact=None, timer=None):
         extra = self.get_customizations()
 
-        return OpenAPICodec().encode(data, extra=extra)
+        return OpenAPICodec().encode_host_independent(
+            document, extra=extra, use_definitions=openapi_settings.USE_DEFINITIONS, compact=compact, timer=timer)
 
 
 class SwaggerUIRenderer(_SwaggerUIRenderer):
     template = 'drf_openapi/index.html'
 
 
-def _generate_openapi_object(document):
+def _get_separators(encode, compact):
+    """Return the item and key separators ``encode`` puts between the members of an object."""
+    probe = encode(OrderedDict([('a', 0), ('b', 0)]), compact)
+    value = probe.index(b'0')
+    return probe[value + 1:probe.index(b'"b"')], probe[len(b'{"a"'):value]
+
+
+def _generate_openapi_object(document, use_definitions=False, url=None):
     """
     Generates root of the Swagger spec.
+    With ``use_definitions``, serializer schemas are emitted once in ``definitions`` and referenced with ``$ref``.
     """
-    parsed_url = urlparse.urlparse(document.url)
+    swagger = _generate_openapi_header(document, url=url)
+
+    definitions = _Definitions() if use_definitions else None
+    swagger['paths'] = _get_paths_object(document, definitions)
+    if definitions:
+        swagger['definitions'] = definitions.as_dict()
+
+    return swagger
+
+
+def _generate_openapi_header(document, url=None):
+    """
+    Generates the fields of the Swagger spec root that come before the paths.
+    The host and schemes come from ``url``, by default the URL of the document.
+    Without a document, only the host and schemes are generated.
+    """
+    parsed_url = urlparse.urlparse(document.url if url is None else url)
 
     swagger = OrderedDict()
 
-    swagger['swagger'] = '2.0'
-    swagger['info'] = OrderedDict()
-    swagger['info']['title'] = document.title
-    swagger['info']['description'] = document.description
-    swagger['info']['version'] = document.version
+    if document is not None:
+        swagger['swagger'] = '2.0'
+        swagger['info'] = OrderedDict()
+        swagger['info']['title'] = document.title
+        swagger['info']['description'] = document.description
+        swagger['info']['version'] = document.version
 
     if parsed_url.netloc:
         swagger['host'] = parsed_url.netloc
     if parsed_url.scheme:
         swagger['schemes'] = [parsed_url.scheme]
 
-    swagger['paths'] = _get_paths_object(document)
-
     return swagger
 
 
-def _get_paths_object(document):
-    paths = OrderedDict()
+def _get_paths_object(document, definitions=None):
+    return OrderedDict(_iter_paths(document, definitions))
 
-    links = _get_links(document)
 
-    for operation_id, link, tags in links:
-        if link.url not in paths:
-            paths[link.url] = OrderedDict()
-
-        method = get_method(link)
-        operation = _get_operation(operation_id, link, tags)
-        paths[link.url].update({method: operation})
+def _iter_paths(document, definitions=None):
+    """
+    Yield the ``(url, path item)`` of the paths object one at a time.
+    Operations are only generated as their path is reached.
+    """
+    links_by_url = OrderedDict()
+    for operation_id, link, tags in _get_links(document):
+        links_by_url.setdefault(link.url, []).append((operation_id, link, tags))
 
-    return paths
+    for url, links in links_by_url.items():
+        path = OrderedDict()
+        for operation_id, link, tags in links:
+            method = get_method(link)
+            operation = _get_operation(operation_id, link, tags, definitions)
+            path.update({method: operation})
+        yield url, path
 
 
-def _get_operation(operation_id, link, tags):
+def _get_operation(operation_id, link, tags, definitions=None):
     encoding = get_encoding(link)
     description = link.description.strip()
     # summary = description.splitlines()[0] if description else None
@@ -165,7 +414,7 @@ def _get_operation(operation_id, link, tags):
 
     operation = {
         'operationId': operation_id,
-        'responses': _get_responses(link),
+        'responses': _get_responses(link, definitions),
         'parameters': _get_parameters(link, encoding)
     }
 
@@ -180,16 +429,76 @@ def _get_operation(operation_id, link, tags):
     return operation
 
 
-def _get_responses(link):
+def _get_responses(link, definitions=None):
     """ Returns an OpenApi-compliant response
     """
     template = link.response_schema
     template.update({'description': 'Success'})
-    res = {200: template}
-    res.update(link.error_status_codes)
+    if definitions is not None and 'schema' in template:
+        template = dict(template, schema=definitions.reference(template['schema']))
+    # Status codes are JSON object keys, some encoders only accept strings
+    res = {'200': template}
+    for status_code, response in link.error_status_codes.items():
+        res[str(status_code)] = response
     return res
 
 
+class _Definitions(object):
+    """Collects the serializer schemas of a document into its ``definitions`` section."""
+
+    def __init__(self):
+        self._definitions = OrderedDict()
+        self._names = {}
+        self._taken = set()
+
+    def __bool__(self):
+        return bool(self._names)
+    __nonzero__ = __bool__
+
+    def get_name(self, serializer_class):
+        name = self._names.get(serializer_class)
+        if name is None:
+            # Serializers from different modules may share a name
+            name = serializer_class.__name__
+            suffix = 1
+            while name in self._taken:
+                suffix += 1
+                name = '{}{}'.format(serializer_class.__name__, suffix)
+            self._names[serializer_class] = name
+            self._taken.add(name)
+        return name
+
+    def reference(self, schema):
+        """Return ``schema`` with every serializer schema in it replaced by a ``$ref`` to its definition."""
+        if isinstance(schema, SerializerSchema):
+            name = self.get_name(schema.serializer_class)
+            if name not in self._definitions and not schema.reference_only:
+                # Register the name first, a serializer may (indirectly) contain itself
+                self._definitions[name] = None
+                self._definitions[name] = self.reference(
+                    {key: value for key, value in schema.items() if key != 'description'})
+
+            ref = {'$ref': '#/definitions/' + name}
+            if schema.get('description'):
+                # Siblings of $ref are ignored, allOf keeps the description of this particular use
+                return {'description': schema['description'], 'allOf': [ref]}
+            return ref
+
+        if isinstance(schema, dict):
+            return {key: self.reference(value) for key, value in schema.items()}
+        if isinstance(schema, list):
+            return [self.reference(item) for item in schema]
+        return schema
+
+    def as_dict(self):
+        definitions = OrderedDict()
+        for serializer_class, name in self._names.items():
+            # Serializers only ever referenced from their own schema have no full definition
+            definition = self._definitions.get(name)
+            definitions[name] = {'type': 'object'} if definition is None else definition
+        return definitions
+
+
 def _get_field_type(field):
     type_name_map = {
         coreschema.String: 'string',
@@ -0,0 +1,93 @@
+# coding=utf-8
+"""JSON encoder backends for the OpenAPI codec.
+
+An encoder is a callable ``encoder(data, compact)`` returning the JSON encoding of ``data`` as bytes.
+The backend is chosen with the ``JSON_ENCODER`` setting: one of the names of :code:`JSON_ENCODERS`,
+``'auto'`` for the fastest one installed, or the dotted path of a custom encoder.
+The libraries other than the standard ``json`` module are optional and only imported when selected.
+"""
+import json
+
+from coreapi.compat import force_bytes
+from django.utils.encoding import force_text
+from django.utils.functional import Promise
+from django.utils.module_loading import import_string
+
+from drf_openapi.settings import openapi_settings
+
+COMPACT_SEPARATORS = (',', ':')
+
+
+def _default(obj):
+    # Descriptions and help texts may be lazy translations
+    if isinstance(obj, Promise):
+        return force_text(obj)
+    raise TypeError('Object of type {} is not JSON serializable'.format(obj.__class__.__name__))
+
+
+def encode_json(data, compact=False):
+    if compact:
+        return force_bytes(json.dumps(data, separators=COMPACT_SEPARATORS, default=_default))
+    return force_bytes(json.dumps(data, default=_default))
+
+
+def encode_simplejson(data, compact=False):
+    import simplejson
+    if compact:
+        return force_bytes(simplejson.dumps(data, separators=COMPACT_SEPARATORS, default=_default))
+    return force_bytes(simplejson.dumps(data, default=_default))
+
+
+def encode_ujson(data, compact=False):
+    import ujson
+    # ujson output is always compact, and it doesn't support a default hook on all its versions:
+    # the generator forces lazy translations to text
+    return force_bytes(ujson.dumps(data))
+
+
+def encode_orjson(data, compact=False):
+    import orjson
+    # orjson output is always compact
+    return orjson.dumps(data, default=_default)
+
+
+JSON_ENCODERS = {
+    'json': encode_json,
+    'simplejson': encode_simplejson,
+    'ujson': encode_ujson,
+    'orjson': encode_orjson,
+}
+
+# Fastest first
+AUTO_PREFERENCE = ('orjson', 'ujson', 'simplejson', 'json')
+
+_resolved = {}
+
+
+def _is_installed(module_name):
+    try:
+        __import__(module_name)
+    except ImportError:
+        return False
+    return True
+
+
+def get_json_encoder(name=None):
+    """Return the encoder called ``name``, by default the one selected by the ``JSON_ENCODER`` setting."""
+    if name is None:
+        name = openapi_settings.JSON_ENCODER
+    try:
+        return _resolved[name]
+    except KeyError:
+        pass
+
+    if name == 'auto':
+        encoder = JSON_ENCODERS[next(
+            backend for backend in AUTO_PREFERENCE if backend == 'json' or _is_installed(backend))]
+    elif name in JSON_ENCODERS:
+        encoder = JSON_ENCODERS[name]
+    else:
+        encoder = import_string(name)
+
+    _resolved[name] = encoder
+    return encoder
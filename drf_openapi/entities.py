@@ -1,97 +1,48 @@
 # coding=utf-8
-import operator
 from collections import OrderedDict
 
 import coreschema
 import uritemplate
 from coreapi import Link, Document, Field
-from coreapi.compat import force_text
 from django.db import models
+from django.utils.encoding import force_text
 from django.utils.functional import Promise
-from pkg_resources import parse_version
 from rest_framework import serializers
 from rest_framework.fields import IntegerField, URLField
 from rest_framework.pagination import PageNumberPagination, LimitOffsetPagination, CursorPagination
+from rest_framework.request import clone_request
 from rest_framework.schemas import SchemaGenerator
 from rest_framework.schemas.generators import insert_into, distribute_links, LinkNode
 from rest_framework.schemas.inspectors import get_pk_description, field_to_schema
 
-from drf_openapi.codec import _get_parameters
+from drf_openapi.codec import SerializerSchema, _get_parameters
+from drf_openapi.settings import openapi_settings
+from drf_openapi.timing import NULL_TIMER
+from drf_openapi.versioning import VersionedSerializers  # noqa: F401 (imported from here by existing projects)
 
+# Serializer schemas shared by every generator when the SHARE_SERIALIZER_SCHEMAS setting is on
+_shared_serializer_schemas = {}
 
-class VersionedSerializers:
-    """Adapted from https://github.com/avanov/Rhetoric/ :)
-    """
-    OPERATORS = {
-        '>': operator.gt,
-        '<': operator.lt,
-        '==': operator.eq,
-        '>=': operator.ge,
-        '<=': operator.le
-    }
-
-    """
-    A map of version and serializer definition
-    May be represented in the following form
-
-    1. ``VERSION``
-    2. ``==VERSION`` (the same as above)
-    3. ``>VERSION``
-    4. ``<VERSION``
-    5. ``>=VERSION``
-    6. ``<=Version``
-    7. Comma-separated list of 1-7 evaluated as AND
-
-    Must override in subclass, for example
-
-    VERSION_MAP = (
-        ('>1.3, <=1.6', MeSerializer16)
-        ('>1.6', MeSerializer)
-    )
-
-    """
-    VERSION_MAP = ()
-
-    @classmethod
-    def get(cls, request_version):
-        for allowed_version, schema in cls.VERSION_MAP:
-            distinct_versions = [version.strip() for version in allowed_version.split(',')]
-            matched = True
-            for distinct_version in distinct_versions:
-                operation = cls.OPERATORS.get(distinct_version[:2])
-                if operation:
-                    # prepare cases #2, #5, #6
-                    compare_with = distinct_version[2:]
-                else:
-                    operation = cls.OPERATORS.get(distinct_version[0])
-                    if operation:
-                        # prepare cases #3, #4
-                        compare_with = distinct_version[1:]
-                    else:
-                        # prepare case #1
-                        compare_with = distinct_version
-                        operation = cls.OPERATORS['==']
-
-                matched = operation(parse_version(request_version), parse_version(compare_with))
-                if not matched:
-                    matched = False
-
-            if matched:
-                return schema
-
-        raise ValueError('Invalid request version {}'.format(request_version))
-    get.__func__.__annotations__ = {'request_version': str}
+# Serializer classes of paginated lists, by (child serializer class, pagination class)
+_paginator_serializers = {}
 
 
 class OpenApiSchemaGenerator(SchemaGenerator):
-    def __init__(self, version, title=None, url=None, description=None, patterns=None, urlconf=None):
+    def __init__(self, version, title=None, url=None, description=None, patterns=None, urlconf=None, timer=None):
         self.version = version
         super(OpenApiSchemaGenerator, self).__init__(title, url, description, patterns, urlconf)
+        self.timer = NULL_TIMER if timer is None else timer
+        if openapi_settings.SHARE_SERIALIZER_SCHEMAS:
+            self._serializer_schemas = _shared_serializer_schemas
+        else:
+            self._serializer_schemas = {}
+        self._serializer_stack = set()
 
     def get_schema(self, request=None, public=False):
         if self.endpoints is None:
-            inspector = self.endpoint_inspector_cls(self.patterns, self.urlconf)
-            self.endpoints = inspector.get_api_endpoints()
+            with self.timer.phase('enumerate'):
+                inspector = self.endpoint_inspector_cls(self.patterns, self.urlconf)
+                self.endpoints = inspector.get_api_endpoints()
 
         links = self.get_links(None if public else request)
         if not links:
@@ -119,10 +70,12 @@ class OpenApiSchemaGenerator(SchemaGenerator):
         paths = []
         view_endpoints = []
         for path, method, callback in self.endpoints:
-            view = self.create_view(callback, method, request)
+            with self.timer.phase('create_view') as phase:
+                view = self.create_view(callback, method, request)
             if getattr(view, 'exclude_from_schema', False):
                 continue
             path = self.coerce_path(path, method, view)
+            self.timer.add_endpoint_phase(path, method, phase)
             paths.append(path)
             view_endpoints.append((path, method, view))
 
@@ -132,9 +85,11 @@ class OpenApiSchemaGenerator(SchemaGenerator):
         prefix = self.determine_path_prefix(paths)
 
         for path, method, view in view_endpoints:
-            if not self.has_view_permissions(path, method, view):
-                continue
-            link = self.get_link(path, method, view, version=getattr(request, 'version', None))
+            with self.timer.endpoint(path, method):
+                with self.timer.phase('permissions'):
+                    if not self.has_view_permissions(path, method, view):
+                        continue
+                link = self.get_link(path, method, view, version=getattr(request, 'version', None) or self.version)
             subpath = path[len(prefix):]
             keys = self.get_keys(subpath, method, view)
             try:
@@ -143,6 +98,78 @@ class OpenApiSchemaGenerator(SchemaGenerator):
                 continue
         return links
 
+    def get_link_tree(self):
+        """
+        Return the links of every endpoint as a :code:`LinkTree`, generated without a request so that it can be
+        shared by all users and filtered with their permissions, or ``None`` if there is no endpoint.
+        """
+        if self.endpoints is None:
+            with self.timer.phase('enumerate'):
+                inspector = self.endpoint_inspector_cls(self.patterns, self.urlconf)
+                self.endpoints = inspector.get_api_endpoints()
+
+        view_endpoints = []
+        for path, method, callback in self.endpoints:
+            with self.timer.phase('create_view') as phase:
+                view = self.create_view(callback, method, None)
+            if getattr(view, 'exclude_from_schema', False):
+                continue
+            path = self.coerce_path(path, method, view)
+            self.timer.add_endpoint_phase(path, method, phase)
+            view_endpoints.append((path, method, view))
+
+        if not view_endpoints:
+            return None
+        prefix = self.determine_path_prefix([path for path, _, _ in view_endpoints])
+
+        endpoints = []
+        for path, method, view in view_endpoints:
+            with self.timer.endpoint(path, method):
+                link = self.get_link(path, method, view, version=self.version)
+            endpoints.append((path, method, view, self.get_keys(path[len(prefix):], method, view), link))
+        return LinkTree(endpoints)
+
+    def get_permission_fingerprint(self, link_tree, request):
+        """
+        Return which endpoints of ``link_tree`` the user of ``request`` may access, as a string of ``'1'``
+        (allowed) and ``'0'`` (denied) in the order of the endpoints, identical for users with the same access.
+        """
+        outcomes = []
+        # The request as seen by the views of each method
+        requests = {}
+        with self.timer.phase('permissions'):
+            for path, method, view, _, _ in link_tree.endpoints:
+                if request is not None:
+                    if method not in requests:
+                        requests[method] = clone_request(request, method)
+                    view = _copy_view(view, requests[method])
+                outcomes.append('1' if self.has_view_permissions(path, method, view) else '0')
+        return ''.join(outcomes)
+
+    def get_filtered_schema(self, link_tree, fingerprint, request=None):
+        """Return the document of the endpoints of ``link_tree`` allowed by ``fingerprint``."""
+        links = LinkNode()
+        for allowed, (_, _, _, keys, link) in zip(fingerprint, link_tree.endpoints):
+            if allowed != '1':
+                continue
+            try:
+                insert_into(links, keys, link)
+            except Exception:
+                continue
+        if not links:
+            return None
+
+        url = self.url
+        if not url and request is not None:
+            url = request.build_absolute_uri()
+
+        distribute_links(links)
+        return OpenApiDocument(
+            version=self.version,
+            title=self.title, description=self.description,
+            url=url, content=links
+        )
+
     def get_serializer_doc(self, serializer):
         if serializer.__doc__ is None:
             return ''
@@ -156,10 +183,14 @@ class OpenApiSchemaGenerator(SchemaGenerator):
         method_name = getattr(view, 'action', method.lower())
         method_func = getattr(view, method_name, None)
 
-        fields = self.get_path_fields(path, method, view)
-        fields += self.get_serializer_fields(path, method, view, version=version, method_func=method_func)
-        fields += view.schema.get_pagination_fields(path, method)
-        fields += view.schema.get_filter_fields(path, method)
+        with self.timer.phase('path_fields'):
+            fields = self.get_path_fields(path, method, view)
+        with self.timer.phase('serializer_fields'):
+            fields += self.get_serializer_fields(path, method, view, version=version, method_func=method_func)
+        with self.timer.phase('pagination_fields'):
+            fields += view.schema.get_pagination_fields(path, method)
+        with self.timer.phase('filter_fields'):
+            fields += view.schema.get_filter_fields(path, method)
 
         if fields and any([field.location in ('form', 'body') for field in fields]):
             encoding = view.schema.get_encoding(path, method)
@@ -189,8 +220,9 @@ class OpenApiSchemaGenerator(SchemaGenerator):
             if response_serializer_class and method_name == 'list':
                 response_serializer_class = self.get_paginator_serializer(
                     view, response_serializer_class)
-        response_schema, error_status_codes = self.get_response_object(
-            response_serializer_class, method_func.__doc__) if response_serializer_class else ({}, {})
+        with self.timer.phase('response_object'):
+            response_schema, error_status_codes = self.get_response_object(
+                response_serializer_class, method_func.__doc__) if response_serializer_class else ({}, {})
 
         return OpenApiLink(
             response_schema=response_schema,
@@ -203,21 +235,46 @@ class OpenApiSchemaGenerator(SchemaGenerator):
         )
 
     def get_paginator_serializer(self, view, child_serializer_class):
+        """
+        Return the serializer class of the paginated list of ``child_serializer_class`` returned by ``view``.
+        Pagination classes describe their own envelope with a ``get_paginated_serializer_class(child_serializer_class)``
+        class method, otherwise it is derived from the DRF pagination class they extend.
+        The classes are created once per child serializer and pagination class.
+        """
+        pager = getattr(view, 'pagination_class', None)
+        if pager is not None and hasattr(pager, 'default_pager'):
+            # Must be a ProxyPagination
+            pager = pager.default_pager
+
+        key = (child_serializer_class, pager)
+        try:
+            return _paginator_serializers[key]
+        except KeyError:
+            pass
+
+        if hasattr(pager, 'get_paginated_serializer_class'):
+            serializer_class = pager.get_paginated_serializer_class(child_serializer_class)
+        else:
+            serializer_class = self._build_paginator_serializer(pager, child_serializer_class)
+        # Envelopes are usually declared once for every child, shared definitions are named after the class
+        serializer_class = type(serializer_class)(
+            _get_paginated_serializer_name(child_serializer_class, pager), (serializer_class,), {
+                '__module__': serializer_class.__module__,
+                '__doc__': serializer_class.__doc__,
+            })
+        return _paginator_serializers.setdefault(key, serializer_class)
+
+    def _build_paginator_serializer(self, pager, child_serializer_class):
         class BaseFakeListSerializer(serializers.Serializer):
             results = child_serializer_class(many=True)
 
-        class FakePrevNextListSerializer(BaseFakeListSerializer):
-            next = URLField()
-            previous = URLField()
-
         # Validate if the view has a pagination_class
-        if not (hasattr(view, 'pagination_class')) or view.pagination_class is None:
+        if pager is None:
             return BaseFakeListSerializer
 
-        pager = view.pagination_class
-        if hasattr(pager, 'default_pager'):
-            # Must be a ProxyPagination
-            pager = pager.default_pager
+        class FakePrevNextListSerializer(BaseFakeListSerializer):
+            next = URLField()
+            previous = URLField()
 
         if issubclass(pager, (PageNumberPagination, LimitOffsetPagination)):
             class FakeListSerializer(FakePrevNextListSerializer):
@@ -322,6 +379,7 @@ class OpenApiSchemaGenerator(SchemaGenerator):
             return []
 
         serializer = serializer_class()
+        self.timer.count('serializer_instances')
         if isinstance(serializer, serializers.ListSerializer):
             return [
                 Field(
@@ -335,6 +393,12 @@ class OpenApiSchemaGenerator(SchemaGenerator):
         if not isinstance(serializer, serializers.Serializer):
             return []
 
+        return self.get_request_fields(serializer, location, method)
+
+    def get_request_fields(self, serializer, location='form', method='POST'):
+        """
+        Return a `coreapi.Field` for each field of ``serializer`` that requests of ``method`` may set.
+        """
         fields = []
         for field in serializer.fields.values():
             if field.read_only or isinstance(field, serializers.HiddenField):
@@ -356,32 +420,64 @@ class OpenApiSchemaGenerator(SchemaGenerator):
         return fields
 
     def get_response_object(self, response_serializer_class, description):
+        schema, error_status_codes = self.get_serializer_schema(response_serializer_class)
+        if schema is None:
+            return {}, {}
 
+        return {
+            'description': description,
+            'schema': schema
+        }, dict(error_status_codes)
+
+    def get_serializer_schema(self, serializer_class):
+        """
+        Return the ``(schema, error_status_codes)`` of a response serializer class.
+        Schemas are memoized by class, so serializers nested in many others are only introspected once.
+        The returned schema is shared: copy it before changing it.
+        """
+        try:
+            return self._serializer_schemas[serializer_class]
+        except KeyError:
+            pass
+
+        if serializer_class in self._serializer_stack:
+            # Self-referential serializer, stop recursing and describe the recursive field as a plain object
+            return SerializerSchema(serializer_class, {'type': 'object'}, reference_only=True), {}
+
+        self._serializer_stack.add(serializer_class)
+        try:
+            result = self._build_serializer_schema(serializer_class)
+        finally:
+            self._serializer_stack.discard(serializer_class)
+
+        self._serializer_schemas[serializer_class] = result
+        return result
+
+    def _build_serializer_schema(self, serializer_class):
         fields = []
-        serializer = response_serializer_class()
+        serializer = serializer_class()
+        self.timer.count('serializer_instances')
         nested_obj = {}
 
         for field in serializer.fields.values():
             # If field is a serializer, attempt to get its schema.
             if isinstance(field, serializers.Serializer):
-                subfield_schema = self.get_response_object(field.__class__, None)[0].get('schema')
+                subfield_schema = self.get_serializer_schema(field.__class__)[0]
 
                 # If the schema exists, use it as the nested_obj
                 if subfield_schema is not None:
-                    nested_obj[field.field_name] = subfield_schema
-                    nested_obj[field.field_name]['description'] = field.help_text
+                    nested_obj[field.field_name] = subfield_schema.described(_force_text(field.help_text))
                     continue
 
             # If the field is a list
             elif isinstance(field, (serializers.ListSerializer, serializers.ListField)):
                 # And if the child is a serializer
-                if isinstance(field.child.__class__(), serializers.Serializer):
-                    subfield_schema = self.get_response_object(field.child.__class__, None)[0].get('schema')
+                if isinstance(field.child, serializers.Serializer):
+                    subfield_schema = self.get_serializer_schema(field.child.__class__)[0]
 
                     # If the schema exists, use it as the nested_obj
                     if subfield_schema is not None:
-                        nested_obj[field.field_name] = subfield_schema
-                        nested_obj[field.field_name]['description'] = field.help_text
+                        nested_obj[field.field_name] = subfield_schema.described(_force_text(field.help_text))
                         continue
 
             # Otherwise, carry-on and use the field's schema.
@@ -397,31 +493,57 @@ class OpenApiSchemaGenerator(SchemaGenerator):
 
         if not res:
             if nested_obj:
-                return {
-                    'description': description,
-                    'schema': {
-                        'type': 'object',
-                        'properties': nested_obj
-                    }
-                }, {}
+                return SerializerSchema(serializer_class, {
+                    'type': 'object',
+                    'properties': nested_obj
+                }), {}
             else:
-                return {}, {}
+                return None, {}
 
-        schema = res[0]['schema']
+        schema = SerializerSchema(serializer_class, res[0]['schema'])
         schema['properties'].update(nested_obj)
-        response_schema = {
-            'description': description,
-            'schema': schema
-        }
 
         error_status_codes = {}
 
-        response_meta = getattr(response_serializer_class, 'Meta', None)
+        response_meta = getattr(serializer_class, 'Meta', None)
 
         for status_code, description in getattr(response_meta, 'error_status_codes', {}).items():
-            error_status_codes[status_code] = {'description': description}
+            error_status_codes[status_code] = {'description': _force_text(description)}
+
+        return schema, error_status_codes
+
+
+def _force_text(value):
+    """Return ``value`` as text if it's a lazy translation, e.g. a help text, so that every encoder can encode it."""
+    return force_text(value) if isinstance(value, Promise) else value
+
+
+def _get_paginated_serializer_name(child_serializer_class, pager):
+    """Return the name of the page envelope of ``child_serializer_class``, e.g. ``PageNumberPaginatedItem``."""
+    prefix = ''
+    if pager is not None:
+        prefix = pager.__name__
+        if prefix.endswith('Pagination'):
+            prefix = prefix[:-len('Pagination')]
+    return '{}Paginated{}'.format(prefix, child_serializer_class.__name__)
+
+
+def _copy_view(view, request):
+    """Return a copy of the ``view`` of an endpoint handling ``request``, leaving the shared view untouched."""
+    copied = object.__new__(view.__class__)
+    copied.__dict__.update(view.__dict__)
+    copied.request = request
+    return copied
+
+
+class LinkTree(object):
+    """
+    Links of every endpoint of a version, independent of the user.
+    ``endpoints`` is a list of ``(path, method, view, keys, link)``, the views being created without a request.
+    """
 
-        return response_schema, error_status_codes
+    def __init__(self, endpoints):
+        self.endpoints = endpoints
 
 
 class OpenApiDocument(Document):
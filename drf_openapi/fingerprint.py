@@ -0,0 +1,159 @@
+# coding=utf-8
+"""Fingerprint of the inputs of a schema.
+
+The fingerprint hashes the enumerated endpoints, their view classes, the serializers they declare (``serializer_class``
+and :code:`view_config` request and response serializers, resolved through the ``VERSION_MAP`` of versioned ones)
+and the declarations of the fields of those serializers, without generating any link.
+It changes whenever the schema may change, or drf_openapi is upgraded, so it can key caches and detect schema drift::
+
+    python manage.py openapi_fingerprint --api-version 2.0 --output fingerprint.json
+    python manage.py openapi_fingerprint --api-version 2.0 --check fingerprint.json
+"""
+import hashlib
+from collections import OrderedDict
+
+from django.utils.encoding import force_text
+from django.utils.functional import Promise
+from rest_framework import serializers
+from rest_framework.schemas.generators import EndpointEnumerator
+
+import drf_openapi
+from drf_openapi.versioning import VersionedSerializers
+
+_PRIMITIVE_TYPES = (bool, int, float, type(None), type(''), type(u''))
+
+
+def _qualified_name(obj):
+    return '{}.{}'.format(getattr(obj, '__module__', ''), getattr(obj, '__qualname__', obj.__name__))
+
+
+class _Describer(object):
+    """
+    Describes the schema inputs as nested tuples of strings whose ``repr`` is stable across processes,
+    never evaluating querysets or relying on object addresses.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self._serializers = {}
+
+    def value(self, value):
+        if isinstance(value, Promise):
+            return force_text(value)
+        if isinstance(value, _PRIMITIVE_TYPES):
+            return value
+        if isinstance(value, (list, tuple, set, frozenset)):
+            items = tuple(self.value(item) for item in value)
+            return tuple(sorted(items, key=repr)) if isinstance(value, (set, frozenset)) else items
+        if isinstance(value, dict):
+            return tuple(sorted(((force_text(key), self.value(item)) for key, item in value.items()), key=repr))
+        if isinstance(value, serializers.Field):
+            return self.field(value)
+        if isinstance(value, type):
+            if issubclass(value, (serializers.BaseSerializer, VersionedSerializers)):
+                return self.serializer(value)
+            return _qualified_name(value)
+        # Querysets, validators, callables...: only their type is stable
+        return _qualified_name(value.__class__)
+
+    def field(self, field):
+        if isinstance(field, serializers.ListSerializer):
+            return 'many', self.field(field.child)
+        if isinstance(field, serializers.BaseSerializer):
+            return self.serializer(field.__class__), self.value(getattr(field, '_kwargs', {}))
+        return (
+            _qualified_name(field.__class__),
+            self.value(getattr(field, '_args', ())),
+            self.value(getattr(field, '_kwargs', {})),
+            self.field(field.child) if getattr(field, 'child', None) is not None else None,
+        )
+
+    def serializer(self, serializer_class):
+        """Describe ``serializer_class`` by its name, its declared fields and its model fields."""
+        name = _qualified_name(serializer_class)
+        if serializer_class in self._serializers:
+            # None while being described, for serializers nesting themselves
+            return self._serializers[serializer_class] or name
+        self._serializers[serializer_class] = None
+
+        if issubclass(serializer_class, VersionedSerializers):
+            description = self.versioned_serializers(serializer_class)
+        else:
+            description = (
+                name,
+                force_text(serializer_class.__doc__ or ''),
+                tuple((field_name, self.field(field))
+                      for field_name, field in getattr(serializer_class, '_declared_fields', {}).items()),
+                self.meta(getattr(serializer_class, 'Meta', None)),
+            )
+        self._serializers[serializer_class] = description
+        return description
+
+    def versioned_serializers(self, versioned_class):
+        """Describe the VERSION_MAP of ``versioned_class``, with the declarations of the serializer of this version."""
+        resolved = versioned_class.resolve(self.version)
+        return (
+            _qualified_name(versioned_class),
+            force_text(versioned_class.__doc__ or ''),
+            tuple((specifier, _qualified_name(serializer_class))
+                  for specifier, serializer_class in versioned_class.VERSION_MAP),
+            self.serializer(resolved) if resolved is not None else None,
+        )
+
+    def meta(self, meta):
+        if meta is None:
+            return None
+        options = tuple(
+            (option, self.value(getattr(meta, option)))
+            for option in ('fields', 'exclude', 'read_only_fields', 'extra_kwargs', 'depth')
+            if hasattr(meta, option))
+        model = getattr(meta, 'model', None)
+        return options, self.model(model) if model is not None else None
+
+    def model(self, model):
+        fields = []
+        for field in model._meta.get_fields():
+            if not hasattr(field, 'deconstruct'):
+                # Reverse relations
+                continue
+            name, path, args, kwargs = field.deconstruct()
+            fields.append((name, path, self.value(args), self.value(kwargs)))
+        return model._meta.label, tuple(fields)
+
+    def endpoint(self, path, method, callback):
+        """Describe the endpoint, its view class, its pagination and filters, and its serializers."""
+        view_class = getattr(callback, 'cls', callback)
+        # Viewsets map methods to actions
+        actions = getattr(callback, 'actions', None) or {}
+        handler = getattr(view_class, actions.get(method.lower(), method.lower()), None)
+        return (
+            path,
+            method,
+            _qualified_name(view_class),
+            force_text(view_class.__doc__ or ''),
+            force_text(getattr(handler, '__doc__', None) or ''),
+            self.value(getattr(view_class, 'pagination_class', None)),
+            self.value(getattr(view_class, 'filter_backends', None)),
+            self.value(getattr(view_class, 'serializer_class', None)),
+            self.value(getattr(handler, 'request_serializer', None)),
+            self.value(getattr(handler, 'response_serializer', None)),
+        )
+
+
+def _hash(value):
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()
+
+
+def get_endpoint_fingerprints(version, patterns=None, urlconf=None):
+    """Return the fingerprint of each endpoint of the schema of ``version``, by ``(path, method)``."""
+    describer = _Describer(version)
+    fingerprints = OrderedDict()
+    for path, method, callback in EndpointEnumerator(patterns, urlconf).get_api_endpoints():
+        fingerprints[(path, method)] = _hash(describer.endpoint(path, method, callback))
+    return fingerprints
+
+
+def get_schema_fingerprint(version, patterns=None, urlconf=None):
+    """Return the hexadecimal fingerprint of the inputs of the schema of ``version``."""
+    endpoints = get_endpoint_fingerprints(version, patterns, urlconf)
+    return _hash((drf_openapi.__version__, version, tuple(endpoints.items())))
@@ -0,0 +1,13 @@
+# coding=utf-8
+"""Checks of the methods classes inherit, to tell fields and serializers behaving like the built-in ones."""
+
+
+def get_function(cls, name):
+    """Return the function of the ``name`` method of ``cls``."""
+    method = getattr(cls, name)
+    return getattr(method, '__func__', method)
+
+
+def keeps_method(cls, base, name):
+    """Whether ``cls`` keeps the ``name`` method of ``base``."""
+    return get_function(cls, name) is get_function(base, name)
@@ -0,0 +1,39 @@
+# coding=utf-8
+from django.core.management.base import BaseCommand, CommandError
+
+from drf_openapi.prebuild import build_schemas, get_versions
+from drf_openapi.settings import openapi_settings
+from drf_openapi.views import SchemaView
+
+
+class Command(BaseCommand):
+    help = 'Prebuild the OpenAPI schema of every API version as minified and gzipped JSON files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--api-version', action='append', dest='versions',
+            help='Version to build, may be repeated. Defaults to every configured version.')
+        parser.add_argument(
+            '--output-dir', default=openapi_settings.SCHEMA_DIR,
+            help='Directory to write the schemas to. Defaults to the SCHEMA_DIR setting.')
+        parser.add_argument('--url', default=None, help='Base URL of the API, sets the host and scheme of the schemas.')
+        parser.add_argument('--title', default=SchemaView.title, help='Title of the schemas.')
+        parser.add_argument(
+            '--processes', type=int, default=None,
+            help='Number of worker processes. Defaults to one per version, up to the number of CPUs.')
+
+    def handle(self, *args, **options):
+        if not options['output_dir']:
+            raise CommandError('Pass --output-dir or set DRF_OPENAPI["SCHEMA_DIR"]')
+
+        versions = options['versions'] or get_versions()
+        results = build_schemas(
+            versions, options['output_dir'],
+            url=options['url'], title=options['title'], processes=options['processes'])
+
+        for version, result in zip(versions, results):
+            if result is None:
+                self.stderr.write('Version {}: no endpoint, skipped'.format(version))
+                continue
+            _, path, size, compressed_size = result
+            self.stdout.write('Version {}: {} ({} bytes, {} gzipped)'.format(version, path, size, compressed_size))
@@ -0,0 +1,65 @@
+# coding=utf-8
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from drf_openapi.fingerprint import get_endpoint_fingerprints, get_schema_fingerprint
+from drf_openapi.prebuild import get_versions
+
+
+class Command(BaseCommand):
+    help = ('Print the fingerprint of the schema of every API version, which changes along with its endpoints, '
+            'views and serializers, or check it against an earlier one to detect schema drift.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--api-version', action='append', dest='versions',
+            help='Version to fingerprint, may be repeated. Defaults to every configured version.')
+        parser.add_argument('--output', default=None, help='File to write the fingerprints to, as JSON.')
+        parser.add_argument(
+            '--check', default=None,
+            help='File of earlier fingerprints to compare with, fails listing the endpoints that changed.')
+
+    def handle(self, *args, **options):
+        versions = options['versions'] or get_versions()
+        fingerprints = {}
+        for version in versions:
+            endpoints = get_endpoint_fingerprints(version)
+            fingerprints[version] = {
+                'fingerprint': get_schema_fingerprint(version),
+                'endpoints': {'{} {}'.format(method, path): value for (path, method), value in endpoints.items()},
+            }
+            self.stdout.write('Version {}: {}'.format(version, fingerprints[version]['fingerprint']))
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(fingerprints, output_file, indent=2, sort_keys=True)
+
+        if options['check']:
+            with open(options['check']) as previous_file:
+                previous = json.load(previous_file)
+            changes = self.get_changes(previous, fingerprints)
+            if changes:
+                raise CommandError('The schema changed:\n' + '\n'.join(changes))
+            self.stdout.write('The schema did not change')
+
+    def get_changes(self, previous, current):
+        changes = []
+        for version, fingerprint in sorted(current.items()):
+            if version not in previous:
+                changes.append('Version {}: added'.format(version))
+                continue
+            if previous[version]['fingerprint'] == fingerprint['fingerprint']:
+                continue
+            before, after = previous[version]['endpoints'], fingerprint['endpoints']
+            endpoint_changes = []
+            for endpoint in sorted(set(before) | set(after)):
+                if endpoint not in before:
+                    endpoint_changes.append('Version {}: {} added'.format(version, endpoint))
+                elif endpoint not in after:
+                    endpoint_changes.append('Version {}: {} removed'.format(version, endpoint))
+                elif before[endpoint] != after[endpoint]:
+                    endpoint_changes.append('Version {}: {} changed'.format(version, endpoint))
+            # The endpoints may all be the same, e.g. after upgrading drf_openapi
+            changes.extend(endpoint_changes or ['Version {}: changed'.format(version)])
+        return changes
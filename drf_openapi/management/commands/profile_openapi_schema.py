@@ -0,0 +1,40 @@
+# coding=utf-8
+import json
+
+from django.core.management.base import BaseCommand
+
+from drf_openapi.prebuild import get_versions
+from drf_openapi.profiling import SORT_KEYS, profile_schema
+from drf_openapi.views import SchemaView
+
+
+class Command(BaseCommand):
+    help = ('Report, per endpoint, the time spent generating its part of the OpenAPI schema, '
+            'the serializers it instantiated and the bytes it contributes, most costly first.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--api-version', action='append', dest='versions',
+            help='Version to profile, may be repeated. Defaults to every configured version.')
+        parser.add_argument('--url', default=None, help='Base URL of the API, sets the host and scheme of the schemas.')
+        parser.add_argument('--title', default=SchemaView.title, help='Title of the schemas.')
+        parser.add_argument('--sort', default='time', choices=SORT_KEYS, help='Cost to sort the endpoints by.')
+        parser.add_argument('--limit', type=int, default=None, help='Number of endpoints to report.')
+        parser.add_argument('--json', action='store_true', help='Output the report as JSON.')
+
+    def handle(self, *args, **options):
+        versions = options['versions'] or get_versions()
+        reports = []
+        for version in versions:
+            profile = profile_schema(version, url=options['url'], title=options['title'], sort=options['sort'])
+            if options['json']:
+                report = profile.as_dict()
+                report['endpoints'] = report['endpoints'][:options['limit']]
+                reports.append(report)
+                continue
+            self.stdout.write('Version {}: {:,d} bytes of paths'.format(
+                version, sum(endpoint.bytes for endpoint in profile.endpoints)))
+            self.stdout.write(profile.as_text(limit=options['limit']))
+
+        if options['json']:
+            self.stdout.write(json.dumps(reports, indent=2))
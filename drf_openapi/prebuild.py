@@ -0,0 +1,158 @@
+# coding=utf-8
+"""Build the OpenAPI schemas ahead of time, e.g. at deploy time, and serve them as static files.
+
+Each version is written as minified JSON (``openapi-<version>.json``) along with a gzipped copy
+(``openapi-<version>.json.gz``) that :code:`SchemaView` serves to clients accepting gzip.
+"""
+import gzip
+import io
+import mmap
+import multiprocessing
+import os
+import tempfile
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+
+from drf_openapi.codec import EncodedSchema, OpenAPIRenderer
+from drf_openapi.entities import OpenApiSchemaGenerator
+from drf_openapi.settings import openapi_settings
+
+SCHEMA_FILENAME = 'openapi-{version}.json'
+
+_loaded_schemas = {}
+_loaded_schemas_lock = threading.Lock()
+
+
+def get_versions():
+    """Return the API versions to build schemas for."""
+    versions = openapi_settings.VERSIONS or api_settings.ALLOWED_VERSIONS
+    if not versions and api_settings.DEFAULT_VERSION:
+        versions = [api_settings.DEFAULT_VERSION]
+    if not versions:
+        raise ImproperlyConfigured(
+            'Set DRF_OPENAPI["VERSIONS"] or REST_FRAMEWORK["ALLOWED_VERSIONS"] to the API versions to build')
+    return list(versions)
+
+
+def get_schema_path(directory, version, compressed=False):
+    """
+    Return the path of the prebuilt schema of ``version``.
+    Returns ``None`` for versions that can't be a file name, as versions may come straight from the URL.
+    """
+    filename = SCHEMA_FILENAME.format(version=version)
+    if os.path.basename(filename) != filename or version in ('', '.', '..'):
+        return None
+    path = os.path.join(directory, filename)
+    return path + '.gz' if compressed else path
+
+
+def generate_schema(version, url=None, title=None):
+    """Generate the public schema of ``version`` and return it encoded as minified JSON."""
+    generator = OpenApiSchemaGenerator(version=version, url=url, title=title)
+    document = generator.get_schema(request=None, public=True)
+    if document is None:
+        return None
+    return OpenAPIRenderer().encode(document, compact=True)
+
+
+def _write_atomic(path, content):
+    # Write next to the destination then rename, so that a SchemaView never serves a half-written file
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(content)
+        os.chmod(temp_path, 0o644)
+        os.rename(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+
+def compress(content):
+    buffer = io.BytesIO()
+    # A fixed mtime keeps the output identical for identical schemas
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as gzip_file:
+        gzip_file.write(content)
+    return buffer.getvalue()
+
+
+def build_schema(version, directory, url=None, title=None):
+    """
+    Generate the schema of ``version`` and write it, plain and gzipped, to ``directory``.
+    Returns ``(version, path, size, compressed_size)``, or ``None`` if the version has no endpoint.
+    """
+    path = get_schema_path(directory, version)
+    if path is None:
+        raise ValueError('Invalid version {}'.format(version))
+
+    content = generate_schema(version, url=url, title=title)
+    if content is None:
+        return None
+
+    compressed = compress(content)
+    _write_atomic(path, content)
+    _write_atomic(path + '.gz', compressed)
+    return version, path, len(content), len(compressed)
+
+
+def _setup_worker():
+    # Worker processes that weren't forked from a configured parent start with an empty app registry
+    import django
+    django.setup()
+
+
+def _build_schema_star(args):
+    return build_schema(*args)
+
+
+def build_schemas(versions, directory, url=None, title=None, processes=None):
+    """
+    Build the schemas of ``versions`` into ``directory``, in parallel worker processes
+    unless ``processes`` is 1. Returns the results of :code:`build_schema` in the order of ``versions``.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    tasks = [(version, directory, url, title) for version in versions]
+    if processes is None:
+        processes = min(len(tasks), multiprocessing.cpu_count())
+    if processes <= 1:
+        return [build_schema(*task) for task in tasks]
+
+    pool = multiprocessing.Pool(processes, initializer=_setup_worker)
+    try:
+        return pool.map(_build_schema_star, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def load_schema(directory, version, compressed=False):
+    """
+    Return the prebuilt schema of ``version`` as an :code:`EncodedSchema`, or ``None`` if it wasn't built.
+    Files are read, or mapped in memory with the SCHEMA_MMAP setting, once and reloaded when they change on disk.
+    """
+    path = get_schema_path(directory, version, compressed=compressed)
+    if path is None:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+
+    loaded = _loaded_schemas.get(path)
+    if loaded is not None and loaded.last_modified == mtime:
+        return loaded
+
+    with _loaded_schemas_lock:
+        with open(path, 'rb') as schema_file:
+            if openapi_settings.SCHEMA_MMAP and os.fstat(schema_file.fileno()).st_size:
+                # The mapping stays valid once the file is closed, or replaced by a new build
+                content = mmap.mmap(schema_file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                content = schema_file.read()
+        loaded = EncodedSchema(content, last_modified=mtime, content_encoding='gzip' if compressed else None)
+        _loaded_schemas[path] = loaded
+    return loaded
@@ -0,0 +1,92 @@
+# coding=utf-8
+"""Per-endpoint cost report of the OpenAPI schema.
+
+For each path and method, reports the time spent generating its link, the number of serializers instantiated
+to do so and the number of bytes its operation contributes to the encoded document, to find out which endpoints
+and serializers make the schema huge and slow.
+"""
+from drf_openapi.codec import _iter_paths
+from drf_openapi.encoders import get_json_encoder
+from drf_openapi.entities import OpenApiSchemaGenerator
+from drf_openapi.timing import SchemaTimer
+
+SORT_KEYS = ('time', 'bytes', 'serializer_instances')
+
+
+class EndpointProfile(object):
+
+    def __init__(self, path, method, time=0, serializer_instances=0, size=0):
+        self.path = path
+        self.method = method
+        self.time = time
+        self.serializer_instances = serializer_instances
+        self.bytes = size
+
+    def as_dict(self):
+        return {
+            'path': self.path,
+            'method': self.method,
+            'time': self.time,
+            'serializer_instances': self.serializer_instances,
+            'bytes': self.bytes,
+        }
+
+
+class SchemaProfile(object):
+    """Endpoint profiles of a schema, most costly first."""
+
+    def __init__(self, version, endpoints, timer):
+        self.version = version
+        self.endpoints = endpoints
+        self.timer = timer
+
+    def sort(self, key='time'):
+        if key not in SORT_KEYS:
+            raise ValueError('Cannot sort by {}, choose one of {}'.format(key, ', '.join(SORT_KEYS)))
+        self.endpoints.sort(key=lambda endpoint: getattr(endpoint, key), reverse=True)
+        return self
+
+    def as_dict(self):
+        return {
+            'version': self.version,
+            'phases': dict(self.timer.phases),
+            'counts': dict(self.timer.counts),
+            'total_bytes': sum(endpoint.bytes for endpoint in self.endpoints),
+            'endpoints': [endpoint.as_dict() for endpoint in self.endpoints],
+        }
+
+    def as_text(self, limit=None):
+        lines = ['{:>10}  {:>11}  {:>10}  {:<7} {}'.format('time (ms)', 'serializers', 'bytes', 'method', 'path')]
+        for endpoint in self.endpoints[:limit]:
+            lines.append('{:>10.2f}  {:>11d}  {:>10,d}  {:<7} {}'.format(
+                endpoint.time * 1000, endpoint.serializer_instances, endpoint.bytes, endpoint.method, endpoint.path))
+        return '\n'.join(lines)
+
+
+def profile_schema(version, request=None, url=None, title=None, sort='time'):
+    """
+    Generate the schema of ``version``, for ``request`` or the public one if it's ``None``,
+    and return its :code:`SchemaProfile` sorted by ``sort``, one of :code:`SORT_KEYS`.
+    """
+    timer = SchemaTimer()
+    generator = OpenApiSchemaGenerator(version=version, url=url, title=title, timer=timer)
+    document = generator.get_schema(request=request, public=request is None)
+
+    # Link urls of the document have the version filled in, unlike the paths the generator times
+    endpoints = {}
+    for (path, method), timings in timer.endpoints.items():
+        key = (path.replace('{version}', version), method)
+        endpoints[key] = EndpointProfile(
+            key[0], method, time=timings.get('total', 0),
+            serializer_instances=timer.endpoint_counts.get((path, method), {}).get('serializer_instances', 0))
+
+    if document is not None:
+        encode = get_json_encoder()
+        for path, path_item in _iter_paths(document):
+            for method, operation in path_item.items():
+                key = (path, method.upper())
+                if key not in endpoints:
+                    endpoints[key] = EndpointProfile(path, method.upper())
+                endpoints[key].bytes = len(encode({method: operation}, True))
+
+    return SchemaProfile(version, list(endpoints.values()), timer).sort(sort)
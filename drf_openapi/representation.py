@@ -0,0 +1,273 @@
+# coding=utf-8
+"""Compiled ``to_representation`` of serializers.
+
+DRF serializers represent an instance by walking their readable fields and dispatching to the ``get_attribute`` and
+``to_representation`` methods of each one. The subclass returned by :code:`compiled_serializer` runs a function
+generated for its fields instead, once per set of fields: attributes are read straight from their source, the values
+of common fields are converted inline and nested serializers and lists are inlined in the function of their parent.
+Fields overriding those methods, e.g. related fields or method fields, go through their own methods as usual.
+"""
+import keyword
+import re
+import sys
+from collections import OrderedDict
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Manager
+from rest_framework import fields, serializers
+from rest_framework.fields import SkipField, get_attribute, is_simple_callable
+from rest_framework.relations import PKOnlyObject
+
+from drf_openapi.introspection import get_function, keeps_method
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+
+if sys.version_info[0] >= 3:
+    text_type, integer_types = str, (int,)
+else:
+    text_type, integer_types = unicode, (int, long)  # noqa: F821
+
+# Functions compiled for each serializer class, one per set of fields, beyond which serializers with dynamic fields
+# compile the function of each instance
+MAX_COMPILED_VARIANTS = 16
+
+# Expressions representing a value, for fields keeping the to_representation of these classes
+_INLINE_CONVERSIONS = (
+    (fields.CharField, 'text_type({})'),
+    (fields.IntegerField, 'int({})'),
+    (fields.FloatField, 'float({})'),
+    (fields.ReadOnlyField, '{}'),
+)
+
+# Types of the values read from a source which can't be callables to call
+_PLAIN_TYPES = frozenset(
+    (text_type, bytes, float, bool, type(None), list, tuple, dict, OrderedDict) + integer_types)
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+_NAMESPACE = {
+    'OrderedDict': OrderedDict,
+    'Manager': Manager,
+    'Mapping': Mapping,
+    'ObjectDoesNotExist': ObjectDoesNotExist,
+    'PLAIN_TYPES': _PLAIN_TYPES,
+    'is_simple_callable': is_simple_callable,
+    'PKOnlyObject': PKOnlyObject,
+    'SkipField': SkipField,
+    'get_attribute': get_attribute,
+    'text_type': text_type,
+    'SKIP': object(),
+}
+
+_compiled_serializers = {}
+
+
+def _is_inlinable_serializer(cls):
+    return issubclass(cls, serializers.Serializer) and (
+        keeps_method(cls, serializers.Serializer, 'to_representation') or
+        get_function(cls, 'to_representation') is _to_representation)
+
+
+def _describe(field, bound_fields):
+    """
+    Return the node describing how ``field`` represents its values, appending the fields it uses to ``bound_fields``.
+    Nodes are ``(kind, index of the field in bound_fields, field class, details)`` tuples, and only depend on the
+    declarations of the fields, so that serializers with the same fields share their compiled function.
+    """
+    index = len(bound_fields)
+    bound_fields.append(field)
+    cls = field.__class__
+    if _is_inlinable_serializer(cls):
+        return 'serializer', index, cls, tuple(
+            (child.field_name, tuple(child.source_attrs), keeps_method(child.__class__, fields.Field, 'get_attribute'),
+             _describe(child, bound_fields))
+            for child in field._readable_fields)
+    if isinstance(field, serializers.ListSerializer) and (
+            keeps_method(cls, serializers.ListSerializer, 'to_representation')):
+        return 'many', index, cls, _describe(field.child, bound_fields)
+    if isinstance(field, fields.ListField) and keeps_method(cls, fields.ListField, 'to_representation'):
+        return 'list', index, cls, _describe(field.child, bound_fields)
+    if isinstance(field, fields.ChoiceField) and keeps_method(cls, fields.ChoiceField, 'to_representation'):
+        return 'choice', index, cls, None
+    for base, expression in _INLINE_CONVERSIONS:
+        if isinstance(field, base) and keeps_method(cls, base, 'to_representation'):
+            return 'inline', index, cls, expression
+    return 'method', index, cls, None
+
+
+class _Compiler(object):
+    """Emits the source of the function representing the values of a node."""
+
+    def __init__(self):
+        self.lines = []
+        self.fields = set()
+        self.methods = set()
+        self.choices = set()
+        self._names = 0
+
+    def name(self, prefix):
+        self._names += 1
+        return '{}{}'.format(prefix, self._names)
+
+    def emit(self, indent, line):
+        self.lines.append('    ' * indent + line)
+
+    def expression(self, node, value):
+        """Return the expression representing the non-None ``value`` of ``node``, or ``None`` if it takes statements."""
+        kind, index, _, details = node
+        if kind == 'inline':
+            return details.format(value)
+        if kind == 'choice':
+            self.choices.add(index)
+            return '({0} if {0} == \'\' else C{1}.get(text_type({0}), {0}))'.format(value, index)
+        if kind == 'method':
+            self.methods.add(index)
+            return 'R{}({})'.format(index, value)
+        return None
+
+    def represent(self, node, value, target, indent):
+        """Emit the statements assigning the representation of the non-None ``value`` of ``node`` to ``target``."""
+        kind, index, _, details = node
+        expression = self.expression(node, value)
+        if expression is not None:
+            self.emit(indent, '{} = {}'.format(target, expression))
+        elif kind == 'serializer':
+            result = self.name('r')
+            mapping = self.name('m')
+            self.emit(indent, '{} = OrderedDict()'.format(result))
+            self.emit(indent, '{} = isinstance({}, Mapping)'.format(mapping, value))
+            for field_name, source_attrs, plain_attribute, child in details:
+                self.field(field_name, source_attrs, plain_attribute, child, value, mapping, result, indent)
+            self.emit(indent, '{} = {}'.format(target, result))
+        else:
+            self.items(kind, details, value, target, indent)
+
+    def items(self, kind, child, value, target, indent):
+        """Emit the representation of the items of a list, skipping None items of list fields like they do."""
+        item = self.name('i')
+        if kind == 'many':
+            iterable = '({0}.all() if isinstance({0}, Manager) else {0})'.format(value)
+        else:
+            iterable = value
+        expression = self.expression(child, item)
+        if expression is not None:
+            if kind == 'list':
+                expression = 'None if {} is None else {}'.format(item, expression)
+            self.emit(indent, '{} = [{} for {} in {}]'.format(target, expression, item, iterable))
+            return
+
+        items = self.name('l')
+        self.emit(indent, '{} = []'.format(items))
+        self.emit(indent, 'for {} in {}:'.format(item, iterable))
+        if kind == 'list':
+            self.emit(indent + 1, 'if {} is None:'.format(item))
+            self.emit(indent + 2, '{}.append(None)'.format(items))
+            self.emit(indent + 2, 'continue')
+        represented = self.name('v')
+        self.represent(child, item, represented, indent + 1)
+        self.emit(indent + 1, '{}.append({})'.format(items, represented))
+        self.emit(indent, '{} = {}'.format(target, items))
+
+    def field(self, field_name, source_attrs, plain_attribute, node, instance, mapping, result, indent):
+        """Emit the representation of a field of a serializer, following ``Serializer.to_representation``."""
+        index = node[1]
+        self.fields.add(index)
+        value = self.name('v')
+        single_attr = plain_attribute and len(source_attrs) == 1
+        if single_attr:
+            # Flattened fields.get_attribute, calling callables through it
+            attr = source_attrs[0]
+            if _IDENTIFIER.match(attr) and not keyword.iskeyword(attr):
+                access = '{}.{}'.format(instance, attr)
+            else:
+                access = 'getattr({}, {!r})'.format(instance, attr)
+            self.emit(indent, 'try:')
+            self.emit(indent + 1, '{} = {}[{!r}] if {} else {}'.format(value, instance, attr, mapping, access))
+            self.emit(indent, 'except ObjectDoesNotExist:')
+            self.emit(indent + 1, '{} = None'.format(value))
+        elif plain_attribute:
+            self.emit(indent, 'try:')
+            self.emit(indent + 1, '{} = get_attribute({}, {!r})'.format(value, instance, source_attrs))
+        if plain_attribute:
+            # Leave defaults, skipped fields and errors to the field
+            self.emit(indent, 'except (KeyError, AttributeError):')
+            indent += 1
+        self.emit(indent, 'try:')
+        self.emit(indent + 1, '{} = F{}.get_attribute({})'.format(value, index, instance))
+        self.emit(indent, 'except SkipField:')
+        self.emit(indent + 1, '{} = SKIP'.format(value))
+        if plain_attribute:
+            indent -= 1
+        if single_attr:
+            self.emit(indent, 'else:')
+            self.emit(indent + 1, 'if {0}.__class__ not in PLAIN_TYPES and is_simple_callable({0}):'.format(value))
+            self.emit(indent + 2, '{} = get_attribute({}, {!r})'.format(value, instance, source_attrs))
+
+        target = '{}[{!r}]'.format(result, field_name)
+        self.emit(indent, 'if {} is not SKIP:'.format(value))
+        if plain_attribute:
+            self.emit(indent + 1, 'if {} is None:'.format(value))
+        else:
+            # Related fields may get primary key only objects
+            self.emit(indent + 1, 'if {0} is None or isinstance({0}, PKOnlyObject) and {0}.pk is None:'.format(value))
+        self.emit(indent + 2, '{} = None'.format(target))
+        self.emit(indent + 1, 'else:')
+        self.represent(node, value, target, indent + 2)
+
+
+def _compile(node):
+    """Return the function binding the fields of ``node`` to the function representing its values."""
+    compiler = _Compiler()
+    compiler.represent(node, 'instance', 'result', 2)
+    lines = ['def bind(F):']
+    lines.extend('    F{0} = F[{0}]'.format(index) for index in sorted(compiler.fields))
+    lines.extend('    R{0} = F[{0}].to_representation'.format(index) for index in sorted(compiler.methods))
+    lines.extend('    C{0} = F[{0}].choice_strings_to_values'.format(index) for index in sorted(compiler.choices))
+    lines.append('    def represent(instance):')
+    lines.extend(compiler.lines)
+    lines.extend(['        return result', '    return represent'])
+
+    namespace = dict(_NAMESPACE)
+    code = compile('\n'.join(lines), '<representation of {}>'.format(node[2].__name__), 'exec')
+    exec(code, namespace)
+    return namespace['bind']
+
+
+def _bind(serializer):
+    bound_fields = []
+    node = _describe(serializer, bound_fields)
+    compiled = serializer._representations.get(node)
+    if compiled is None:
+        compiled = _compile(node)
+        if len(serializer._representations) < MAX_COMPILED_VARIANTS:
+            serializer._representations[node] = compiled
+    return compiled(bound_fields)
+
+
+def _to_representation(self, instance):
+    represent = self.__dict__.get('_represent')
+    if represent is None:
+        represent = self._represent = _bind(self)
+    return represent(instance)
+
+
+def compiled_serializer(serializer_class):
+    """
+    Return the subclass of ``serializer_class`` representing instances with the function compiled for its fields,
+    or ``serializer_class`` itself when it overrides ``to_representation``.
+    """
+    if not _is_inlinable_serializer(serializer_class) or '_representations' in vars(serializer_class):
+        return serializer_class
+    compiled = _compiled_serializers.get(serializer_class)
+    if compiled is None:
+        compiled = _compiled_serializers[serializer_class] = type(serializer_class)(
+            serializer_class.__name__, (serializer_class,), {
+                '__module__': serializer_class.__module__,
+                '__doc__': serializer_class.__doc__,
+                'to_representation': _to_representation,
+                '_representations': {},
+            })
+    return compiled
@@ -0,0 +1,102 @@
+# coding=utf-8
+"""Settings for DRF OpenAPI are all namespaced in the DRF_OPENAPI setting, e.g.
+
+DRF_OPENAPI = {
+    'SCHEMA_CACHE_TIMEOUT': 600,
+}
+
+Adapted from https://github.com/marcgibbons/django-rest-swagger/blob/master/rest_framework_swagger/settings.py
+"""
+from django.conf import settings
+from django.test.signals import setting_changed
+from rest_framework.settings import APISettings
+
+
+DEFAULTS = {
+    # Seconds a generated schema stays in the in-process cache, ``None`` to never expire
+    'SCHEMA_CACHE_TIMEOUT': 300,
+    # Maximum number of schemas held in the in-process cache, least recently used are evicted first
+    'SCHEMA_CACHE_MAX_ENTRIES': 64,
+    # Keep the schema of each response serializer class for the lifetime of the process
+    # instead of recomputing it for every generated document
+    'SHARE_SERIALIZER_SCHEMAS': False,
+    # Emit each serializer schema once under the top-level ``definitions`` and reference it with ``$ref``
+    'USE_DEFINITIONS': False,
+    # JSON encoder backend: 'json', 'simplejson', 'ujson', 'orjson', 'auto' (fastest installed) or a dotted path
+    'JSON_ENCODER': 'json',
+    # Encode the OpenAPI document without insignificant whitespace
+    'COMPACT_JSON': False,
+    # Stream the OpenAPI document as it is encoded rather than encoding it in memory first.
+    # Streamed documents aren't kept encoded, so they are served without ETag
+    'STREAM_SCHEMA': False,
+    # API versions to prebuild schemas for, defaults to REST_FRAMEWORK's ALLOWED_VERSIONS
+    'VERSIONS': None,
+    # Directory the prebuilt schemas are written to, and served from by SchemaView when set
+    'SCHEMA_DIR': None,
+    # Record how long each phase of generating and encoding the schema takes,
+    # sent in a Server-Timing header by SchemaView and to the ``schema_timings`` signal
+    'TIMINGS': False,
+    # Dotted path of a callable also given the timings, as ``callback(timer, request=request, version=version)``
+    'TIMINGS_CALLBACK': None,
+    # Generate the links of every endpoint once per version and only filter them by the permissions of each user,
+    # users with the same access sharing the same cached document
+    'FILTER_BY_PERMISSIONS': False,
+    # Seconds an expired schema is still served while it gets regenerated, 0 to make every request wait for it,
+    # ``None`` to always serve the previous schema until the new one is ready
+    'SCHEMA_CACHE_STALE_TIMEOUT': 0,
+    # Alias of the Django cache holding the lock that lets a single process at a time generate a schema missing from
+    # the SHARED_SCHEMA_CACHE, ``None`` to let every process generate it
+    'SCHEMA_LOCK_CACHE': None,
+    # Seconds a process holds the lock at most, and waits for another process to release it
+    'SCHEMA_LOCK_TIMEOUT': 60,
+    # Alias of the Django cache to share encoded schemas between processes through, ``None`` to not share them
+    'SHARED_SCHEMA_CACHE': None,
+    # Seconds a schema stays in the shared cache, ``None`` to never expire.
+    # Its key changes along with the endpoints, views and serializers anyway
+    'SHARED_SCHEMA_CACHE_TIMEOUT': 3600,
+    # API versions whose schemas ``drf_openapi.warmup.warm_up()`` generates, in a background thread
+    'WARMUP_VERSIONS': None,
+    # Dotted path of the SchemaView subclass whose cache is warmed up
+    'WARMUP_VIEW': 'drf_openapi.views.SchemaView',
+    # Seconds after which the warmup stops, even in the middle of a version
+    'WARMUP_TIMEOUT': 60,
+    # Keep cached OpenAPI schemas only as their encoded bytes, dropping their documents once encoded, and serve them
+    # from views over those bytes, so that workers forked after a warmup keep sharing a single buffer
+    'IMMUTABLE_SCHEMAS': False,
+    # Map the prebuilt schemas of SCHEMA_DIR in memory rather than reading them,
+    # so that every process shares the pages of the files
+    'SCHEMA_MMAP': False,
+    # Fraction of the responses of view_config(validate_response=True) methods that get validated,
+    # unless the decorator sets its own ``sample_rate``
+    'RESPONSE_VALIDATION_SAMPLE_RATE': 1.0,
+    # Threads validating the responses of view_config(validate_response=True, shadow_validation=True) methods
+    'SHADOW_VALIDATION_WORKERS': 2,
+    # Shadow validations waiting for or running in those threads, beyond which responses aren't validated
+    'SHADOW_VALIDATION_BACKLOG': 100,
+}
+
+IMPORT_STRINGS = [
+    'TIMINGS_CALLBACK',
+    'WARMUP_VIEW',
+]
+
+openapi_settings = APISettings(
+    user_settings=getattr(settings, 'DRF_OPENAPI', {}),
+    defaults=DEFAULTS,
+    import_strings=IMPORT_STRINGS
+)
+
+
+def reload_settings(*args, **kwargs):  # pragma: no cover
+    """
+    Reloads settings in place during unit tests if override_settings decorator is used,
+    so that modules which imported ``openapi_settings`` see the new values.
+    """
+    if kwargs['setting'] != 'DRF_OPENAPI':
+        return
+
+    openapi_settings.__dict__.clear()
+    openapi_settings.__init__(kwargs['value'], DEFAULTS, IMPORT_STRINGS)
+
+
+setting_changed.connect(reload_settings)
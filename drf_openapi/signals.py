@@ -0,0 +1,15 @@
+# coding=utf-8
+from django.dispatch import Signal
+
+# Sent by SchemaView once a request that generated or encoded a schema is done, when the TIMINGS setting is on.
+# Receivers get the `timer` (a drf_openapi.timing.SchemaTimer), the `request` and the API `version`.
+schema_timings = Signal()
+
+# Sent when a response fails the validation of view_config(validate_response=True, shadow_validation=True).
+# Receivers get the `serializer_class` the response was validated with, its `errors`, the `view` and the `request`.
+response_validation_failed = Signal()
+
+# Sent when the response of a view_config(validate_response=True, shadow_validation=True) method isn't validated,
+# because SHADOW_VALIDATION_BACKLOG validations are already pending.
+# Receivers get the `serializer_class` the response would have been validated with, the `view` and the `request`.
+response_validation_skipped = Signal()
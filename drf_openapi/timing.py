@@ -0,0 +1,146 @@
+# coding=utf-8
+"""Instrumentation of schema generation and encoding.
+
+A :code:`SchemaTimer` accumulates the time spent in each phase (endpoint enumeration, view creation,
+permission checks, serializer introspection, encoding...), overall and per endpoint.
+Generators and codecs record into :code:`NULL_TIMER` by default, which doesn't measure anything.
+"""
+from collections import OrderedDict
+from timeit import default_timer
+
+
+class _Phase(object):
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.duration = 0
+
+    def __enter__(self):
+        self._start = default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = default_timer() - self._start
+        self.timer.record(self.name, self.duration)
+
+
+class _Endpoint(object):
+
+    def __init__(self, timer, key):
+        self.timer = timer
+        self.key = key
+
+    def __enter__(self):
+        self._previous = self.timer._current_endpoint
+        self.timer._current_endpoint = self.key
+        self._start = default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timer.record_endpoint(self.key, 'total', default_timer() - self._start)
+        self.timer._current_endpoint = self._previous
+
+
+class SchemaTimer(object):
+    """Durations, in seconds, of the phases of generating and encoding a schema."""
+
+    def __init__(self):
+        self.phases = OrderedDict()
+        # (path, method) -> phase -> duration
+        self.endpoints = OrderedDict()
+        # Occurrences of notable operations, e.g. serializer instantiations, overall and per endpoint
+        self.counts = OrderedDict()
+        self.endpoint_counts = OrderedDict()
+        self._current_endpoint = None
+
+    def phase(self, name):
+        """Context manager timing the phase ``name``, also attributed to the current endpoint if any."""
+        return _Phase(self, name)
+
+    def endpoint(self, path, method):
+        """Context manager attributing the phases timed inside it to the endpoint ``path`` and ``method``."""
+        return _Endpoint(self, (path, method))
+
+    def record(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0) + duration
+        if self._current_endpoint is not None:
+            self.record_endpoint(self._current_endpoint, name, duration)
+
+    def record_endpoint(self, key, name, duration):
+        timings = self.endpoints.setdefault(key, OrderedDict())
+        timings[name] = timings.get(name, 0) + duration
+
+    def add_endpoint_phase(self, path, method, phase):
+        """Attribute an already timed ``phase`` to an endpoint, for phases timed before the endpoint was known."""
+        self.record_endpoint((path, method), phase.name, phase.duration)
+
+    def count(self, name, number=1):
+        self.counts[name] = self.counts.get(name, 0) + number
+        if self._current_endpoint is not None:
+            counts = self.endpoint_counts.setdefault(self._current_endpoint, OrderedDict())
+            counts[name] = counts.get(name, 0) + number
+
+    def __bool__(self):
+        return bool(self.phases)
+    __nonzero__ = __bool__
+
+    def as_server_timing(self):
+        """Return the phases as the value of a ``Server-Timing`` header."""
+        return ', '.join('{};dur={:.3f}'.format(name, duration * 1000) for name, duration in self.phases.items())
+
+    def as_dict(self):
+        return {
+            'phases': dict(self.phases),
+            'counts': dict(self.counts),
+            'endpoints': [
+                {
+                    'path': path,
+                    'method': method,
+                    'timings': dict(timings),
+                    'counts': dict(self.endpoint_counts.get((path, method), {})),
+                }
+                for (path, method), timings in self.endpoints.items()
+            ],
+        }
+
+
+class _NullContext(object):
+    name = None
+    duration = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class NullTimer(object):
+    """A timer that doesn't measure anything, so that instrumentation costs next to nothing when unused."""
+    _context = _NullContext()
+
+    def phase(self, name):
+        return self._context
+
+    def endpoint(self, path, method):
+        return self._context
+
+    def record(self, name, duration):
+        pass
+
+    def record_endpoint(self, key, name, duration):
+        pass
+
+    def add_endpoint_phase(self, path, method, phase):
+        pass
+
+    def count(self, name, number=1):
+        pass
+
+    def __bool__(self):
+        return False
+    __nonzero__ = __bool__
+
+
+NULL_TIMER = NullTimer()
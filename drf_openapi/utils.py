@@ -1,36 +1,101 @@
+import random
 from functools import wraps
 
 from typing import Callable
 
-from drf_openapi.entities import VersionedSerializers
-from rest_framework.response import Response
+from drf_openapi.settings import openapi_settings
+from drf_openapi.versioning import VersionedSerializers
 
 
-def view_config(request_serializer=None, response_serializer=None, validate_response=False):
+# Versions whose serializers each view_config decorated method keeps resolved, beyond which they are resolved per call
+MAX_DISPATCH_VERSIONS = 256
+
+
+def _is_versioned(serializer):
+    return serializer is not None and issubclass(serializer, VersionedSerializers)
+
+
+def _resolve_serializers(request_serializer, response_serializer, version):
+    """Return the ``(request serializer, response serializer)`` of ``version``, or ``None`` for unknown versions."""
+    pair = []
+    for serializer in (request_serializer, response_serializer):
+        if _is_versioned(serializer):
+            serializer = serializer.resolve(version)
+            if serializer is None:
+                return None
+        pair.append(serializer)
+    return tuple(pair)
+
+
+def view_config(request_serializer=None, response_serializer=None, validate_response=False, sample_rate=None,
+                shadow_validation=False, replace_response=True, compile_response=False, prevalidate_request=False,
+                bulk_validation=False, prevalidate_many=False):
+    """
+    Bind the request and response serializers, or versioned serializers, to a view method.
+
+    With ``validate_response``, the response data is validated with the response serializer:
+    a ``sample_rate`` fraction of the responses (the RESPONSE_VALIDATION_SAMPLE_RATE setting by default) is validated,
+    in the background with ``shadow_validation``, which only reports invalid responses rather than failing them.
+    Unless ``replace_response`` is false, validated responses are replaced with the validated data.
+    With ``compile_response``, the response serializer represents instances with a function compiled for its fields.
+    With ``prevalidate_request``, request payloads are checked against the fields of the request serializer
+    before the view method runs, failing malformed ones without running the serializer,
+    and with ``prevalidate_many`` they are lists of payloads checked one by one.
+    With ``bulk_validation``, ``many=True`` instances of the request and response serializers validate lists
+    column by column rather than item by item.
+    """
     def decorator(view_method):
 
         view_method.request_serializer = request_serializer
         view_method.response_serializer = response_serializer
 
+        # Dispatch table of the (request serializer, response serializer) of each version, filled on first use
+        serializers_by_version = {}
+
         @wraps(view_method)
         def wrapper(instance, request, version=None, *args, **kwargs):
-            if request_serializer and issubclass(request_serializer, VersionedSerializers):
-                instance.request_serializer = request_serializer.get(version)
-            else:
-                instance.request_serializer = request_serializer
+            serializers = serializers_by_version.get(version)
+            if serializers is None:
+                serializers = _resolve_serializers(request_serializer, response_serializer, version)
+                if serializers is None:
+                    # Imported here to keep this module cheap to import
+                    from rest_framework.exceptions import NotFound
+                    raise NotFound('Invalid version {}.'.format(version))
+                if bulk_validation:
+                    from drf_openapi.bulk import bulk_serializer
+                    serializers = tuple(
+                        bulk_serializer(serializer) if serializer is not None else None for serializer in serializers)
+                if compile_response and serializers[1] is not None:
+                    from drf_openapi.representation import compiled_serializer
+                    serializers = serializers[0], compiled_serializer(serializers[1])
+                if len(serializers_by_version) < MAX_DISPATCH_VERSIONS:
+                    serializers_by_version[version] = serializers
+            instance.request_serializer, instance.response_serializer = serializers
 
-            if response_serializer and issubclass(response_serializer, VersionedSerializers):
-                instance.response_serializer = response_serializer.get(version)
-            else:
-                instance.response_serializer = response_serializer
+            if prevalidate_request and serializers[0] is not None and request.method in ('POST', 'PUT', 'PATCH'):
+                from drf_openapi.validation import check_request
+                check_request(serializers[0], request, many=prevalidate_many)
 
             response = view_method(instance, request, version=version, *args, **kwargs)
-            if validate_response:
-                response_validator = instance.response_serializer(data=response.data)
-                response_validator.is_valid(raise_exception=True)
-                return Response(response_validator.validated_data)
+            if not validate_response:
+                return response
+
+            rate = openapi_settings.RESPONSE_VALIDATION_SAMPLE_RATE if sample_rate is None else sample_rate
+            if rate < 1 and random.random() >= rate:
+                return response
+
+            if shadow_validation:
+                from drf_openapi.validation import shadow_validate
+                shadow_validate(instance.response_serializer, response.data, instance, request)
+                return response
 
-            return response
+            response_validator = instance.response_serializer(data=response.data)
+            response_validator.is_valid(raise_exception=True)
+            if not replace_response:
+                return response
+            # Imported here to keep this module cheap to import, it pulls in coreapi through DRF serializers
+            from rest_framework.response import Response
+            return Response(response_validator.validated_data)
 
         return wrapper
     decorator.__annotations__ = {'view_method': Callable, 'return': Callable}
@@ -0,0 +1,307 @@
+# coding=utf-8
+"""Validation of view_config request and response payloads off the hot path.
+
+Shadow validation checks a copy of the response data in a thread pool once the view returned it,
+and only reports violations: logged by the ``drf_openapi.validation`` logger and sent with the
+``response_validation_failed`` signal, e.g. to count them in your metrics.
+
+Request validators check request payloads against the fields of the request serializer documented by the generator,
+to reject malformed payloads before the serializer validates them. They only check what the serializer would reject
+anyway: missing required fields, values of the wrong type, strings of the wrong length and unknown choices of the
+built-in fields, and report them in the format of serializer errors.
+"""
+import copy
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from rest_framework import fields, serializers
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.settings import api_settings
+
+from drf_openapi.entities import OpenApiSchemaGenerator
+from drf_openapi.introspection import get_function, keeps_method
+from drf_openapi.settings import openapi_settings
+from drf_openapi.signals import response_validation_failed, response_validation_skipped
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+
+if sys.version_info[0] >= 3:
+    text_type, integer_types = str, (int,)
+else:
+    text_type, integer_types = unicode, (int, long)  # noqa: F821
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+# Slots of the validations waiting for or running in the pool, up to SHADOW_VALIDATION_BACKLOG
+_backlog = None
+
+
+def get_executor():
+    """Return the thread pool of the shadow validations, started on first use."""
+    global _executor, _backlog
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _backlog = threading.BoundedSemaphore(openapi_settings.SHADOW_VALIDATION_BACKLOG)
+                _executor = ThreadPoolExecutor(max_workers=openapi_settings.SHADOW_VALIDATION_WORKERS)
+    return _executor
+
+
+def _validate(serializer_class, data, view, request):
+    try:
+        validator = serializer_class(data=data)
+        if validator.is_valid():
+            return
+        errors = validator.errors
+    except Exception:
+        logger.exception('Failed to validate the response of %s with %s',
+                         view.__class__.__name__, serializer_class.__name__)
+        return
+    finally:
+        _backlog.release()
+        # Database connections are per thread, release the ones this thread opened
+        from django.db import connections
+        connections.close_all()
+    logger.warning('Invalid response of %s %s for %s: %s',
+                   request.method, request.path, serializer_class.__name__, errors)
+    response_validation_failed.send(
+        sender=view.__class__, serializer_class=serializer_class, errors=errors, view=view, request=request)
+
+
+def shadow_validate(serializer_class, data, view, request):
+    """
+    Validate a copy of ``data`` with ``serializer_class`` in the background, reporting violations.
+    Returns the future of the validation, or ``None`` if ``data`` can't be copied or the backlog is full.
+    """
+    executor = get_executor()
+    if not _backlog.acquire(False):
+        # Skip the sample rather than piling up copies of responses
+        logger.warning('Skipped the validation of the response of %s %s for %s, %d validations are pending',
+                       request.method, request.path, serializer_class.__name__,
+                       openapi_settings.SHADOW_VALIDATION_BACKLOG)
+        response_validation_skipped.send(
+            sender=view.__class__, serializer_class=serializer_class, view=view, request=request)
+        return None
+    try:
+        data = copy.deepcopy(data)
+        return executor.submit(_validate, serializer_class, data, view, request)
+    except Exception:
+        _backlog.release()
+        # Never fail the response, e.g. over data holding objects that can't be copied
+        logger.exception('Failed to copy the response of %s for validation with %s',
+                         view.__class__.__name__, serializer_class.__name__)
+        return None
+
+
+def _error(field, code, **kwargs):
+    return ErrorDetail(text_type(field.error_messages[code]).format(**kwargs), code=code)
+
+
+def _check_string(field):
+    max_length, min_length, trim = field.max_length, field.min_length, field.trim_whitespace
+
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, (text_type, float) + integer_types):
+            return _error(field, 'invalid')
+        value = text_type(value)
+        stripped = value.strip()
+        # Blank strings are left to allow_blank, like CharField.run_validation does
+        if value == '' or (trim and not stripped):
+            return None
+        if trim:
+            value = stripped
+        if max_length is not None and len(value) > max_length:
+            return _error(field, 'max_length', max_length=max_length)
+        if min_length is not None and len(value) < min_length:
+            return _error(field, 'min_length', min_length=min_length)
+        return None
+    return check
+
+
+def _check_number(field):
+    def check(value):
+        # Anything else may convert to a number
+        if isinstance(value, (Mapping, list, tuple)):
+            return _error(field, 'invalid')
+        return None
+    return check
+
+
+def _check_boolean(field):
+    values = field.TRUE_VALUES | field.FALSE_VALUES | field.NULL_VALUES
+
+    def check(value):
+        try:
+            if value in values:
+                return None
+        except TypeError:
+            # Unhashable
+            pass
+        return _error(field, 'invalid', input=value)
+    return check
+
+
+def _check_choice(field):
+    choices = frozenset(field.choice_strings_to_values)
+
+    def check(value):
+        if value == '' or text_type(value) in choices:
+            return None
+        return _error(field, 'invalid_choice', input=value)
+    return check
+
+
+def _check_list(field):
+    def check(value):
+        if isinstance(value, (text_type, Mapping)) or not hasattr(value, '__iter__'):
+            return _error(field, 'not_a_list', input_type=type(value).__name__)
+        return None
+    return check
+
+
+def _check_serializer_list(field):
+    def check(value):
+        if not isinstance(value, list):
+            return {api_settings.NON_FIELD_ERRORS_KEY: [
+                _error(field, 'not_a_list', input_type=type(value).__name__)]}
+        return None
+    return check
+
+
+def _check_object(field):
+    def check(value):
+        if not isinstance(value, Mapping):
+            return {api_settings.NON_FIELD_ERRORS_KEY: [_error(field, 'invalid', datatype=type(value).__name__)]}
+        return None
+    return check
+
+
+def _keeps_validation(field, base):
+    """Whether ``field`` reads and validates its values like ``base`` fields do."""
+    cls = field.__class__
+    return all(keeps_method(cls, base, name)
+               for name in ('get_value', 'validate_empty_values', 'run_validation', 'to_internal_value'))
+
+
+# Checks of the values of fields keeping the validation of these classes, the first matching applies
+_CHECKS = (
+    (fields.CharField, _check_string),
+    (serializers.ListSerializer, _check_serializer_list),
+    (serializers.Serializer, _check_object),
+    (fields.ListField, _check_list),
+    (fields.IntegerField, _check_number),
+    (fields.FloatField, _check_number),
+    (fields.BooleanField, _check_boolean),
+    (fields.ChoiceField, _check_choice),
+)
+
+
+def _compile_check(field):
+    """
+    Return the function returning the error of a value ``field`` rejects, or ``None`` to accept any.
+    Only values the field rejects for sure are checked: fields overriding the validation of the class they subclass,
+    like fields of other classes, may accept anything.
+    """
+    for base, check in _CHECKS:
+        if isinstance(field, base):
+            return check(field) if _keeps_validation(field, base) else None
+    return None
+
+
+def _requires_value(field):
+    """Whether ``field`` fails without a value, rather than reading it elsewhere."""
+    cls = field.__class__
+    return field.required and all(
+        get_function(cls, name).__module__ in ('rest_framework.fields', 'rest_framework.serializers')
+        for name in ('get_value', 'validate_empty_values'))
+
+
+class RequestValidator(object):
+    """Checks request payloads against the required fields and the fields of a request serializer."""
+
+    def __init__(self, serializer, request_fields):
+        serializer_fields = serializer.fields
+        self.checks = []
+        for field in request_fields:
+            serializer_field = serializer_fields[field.name]
+            required = field.required and _requires_value(serializer_field)
+            self.checks.append((field.name, _error(serializer_field, 'required') if required else None,
+                                _compile_check(serializer_field)))
+        self.serializer_check = _check_object(serializer)
+
+    def __call__(self, data):
+        """Return the errors of ``data`` by field name, in the format of serializer errors, empty if there are none."""
+        errors = OrderedDict()
+        error = self.serializer_check(data)
+        if error is not None:
+            errors.update(error)
+            return errors
+
+        for name, required, check in self.checks:
+            try:
+                value = data[name]
+            except KeyError:
+                if required is not None:
+                    errors[name] = [required]
+                continue
+            # Null values are left to allow_null
+            if check is None or value is None:
+                continue
+            error = check(value)
+            if error is not None:
+                errors[name] = error if isinstance(error, dict) else [error]
+        return errors
+
+
+_request_validators = {}
+
+
+def get_request_validator(serializer_class, method):
+    """
+    Return the :code:`RequestValidator` of requests of ``method`` to ``serializer_class``, cached per class,
+    or ``None`` for serializers the generator doesn't describe field by field, such as list serializers.
+    """
+    key = (serializer_class, method == 'PATCH')
+    try:
+        return _request_validators[key]
+    except KeyError:
+        pass
+
+    serializer = serializer_class()
+    validator = None
+    if isinstance(serializer, serializers.Serializer):
+        validator = RequestValidator(
+            serializer, OpenApiSchemaGenerator(version=None).get_request_fields(serializer, method=method))
+    _request_validators[key] = validator
+    return validator
+
+
+def check_request(serializer_class, request, many=False):
+    """
+    Raise a ``ValidationError`` with the errors of the payload of ``request`` found by its request validator.
+    ``many`` payloads are lists of payloads, checked one by one.
+    """
+    data = request.data
+    # Form data lists values by key, the serializer parses them
+    if hasattr(data, 'getlist'):
+        return
+    validator = get_request_validator(serializer_class, request.method)
+    if validator is None:
+        return
+    if many:
+        # Payloads that aren't lists are left to the list serializer
+        errors = [validator(item) for item in data] if isinstance(data, list) else []
+        if any(errors):
+            raise ValidationError(errors)
+        return
+    errors = validator(data)
+    if errors:
+        raise ValidationError(errors)
@@ -0,0 +1,292 @@
+# coding=utf-8
+"""Versioned serializers and the version parsing they rely on.
+
+This module is imported by :code:`drf_openapi.utils.view_config` at the time the API views are defined,
+so it must stay cheap to import: no schema generation, coreapi or pkg_resources imports here.
+"""
+import bisect
+import operator
+import re
+import warnings
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    string_types = (basestring,)
+except NameError:
+    string_types = (str,)
+
+
+VERSION_PATTERN = re.compile(r"""
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?:[-_.]?(?P<pre_label>a|b|c|rc|alpha|beta|pre|preview)[-_.]?(?P<pre_number>[0-9]+)?)?
+    (?:-(?P<post_number_implicit>[0-9]+)|[-_.]?(?P<post_label>post|rev|r)[-_.]?(?P<post_number>[0-9]+)?)?
+    (?:[-_.]?(?P<dev_label>dev)[-_.]?(?P<dev_number>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+""", re.VERBOSE | re.IGNORECASE)
+
+PRE_RELEASE_RANKS = {
+    'a': 0, 'alpha': 0,
+    'b': 1, 'beta': 1,
+    'c': 2, 'rc': 2, 'pre': 2, 'preview': 2,
+}
+
+# Components of versions that aren't PEP 440 versions, e.g. ``latest`` or ``v2-beta``, as setuptools splits them
+LEGACY_COMPONENT_PATTERN = re.compile(r'(\d+|[a-z]+|\.|-)')
+LEGACY_REPLACEMENTS = {'pre': 'c', 'preview': 'c', '-': 'final-', 'rc': 'c', 'dev': '@'}
+
+
+def _iter_legacy_parts(version):
+    for part in LEGACY_COMPONENT_PATTERN.split(version):
+        part = LEGACY_REPLACEMENTS.get(part, part)
+        if not part or part == '.':
+            continue
+        if part[:1] in '0123456789':
+            # Padded for numeric comparison
+            yield part.zfill(8)
+        else:
+            yield '*' + part
+    yield '*final'
+
+
+def _get_legacy_key(version):
+    """Return the comparison key of a version that isn't a PEP 440 version, like setuptools' ``LegacyVersion``."""
+    parts = []
+    for part in _iter_legacy_parts(version.lower()):
+        if part.startswith('*'):
+            # Remove '-' before a pre-release tag, and trailing zeros before any tag
+            if part < '*final':
+                while parts and parts[-1] == '*final-':
+                    parts.pop()
+            while parts and parts[-1] == '00000000':
+                parts.pop()
+        parts.append(part)
+    # The epoch of legacy versions, -1, sorts them before every PEP 440 version
+    return -1, tuple(parts)
+
+
+class Version(tuple):
+    """A version, ordered the same way as :code:`pkg_resources.parse_version` orders them.
+
+    It is a plain tuple of comparison keys so that comparing versions costs a tuple comparison.
+    Versions that aren't PEP 440 versions are legacy versions, sorted before every PEP 440 version.
+    """
+
+    def __new__(cls, version):
+        match = VERSION_PATTERN.match(version)
+        if match is None:
+            self = super(Version, cls).__new__(cls, _get_legacy_key(version))
+            self.public = version
+            self.legacy = True
+            return self
+
+        release = [int(part) for part in match.group('release').split('.')]
+        # 1.0 == 1.0.0 == 1
+        while len(release) > 1 and release[-1] == 0:
+            release.pop()
+
+        if match.group('pre_label'):
+            pre = (PRE_RELEASE_RANKS[match.group('pre_label').lower()], int(match.group('pre_number') or 0))
+        elif match.group('dev_label') and not (match.group('post_label') or match.group('post_number_implicit')):
+            # 1.0.dev0 sorts before 1.0a0
+            pre = (-1, 0)
+        else:
+            pre = (len(PRE_RELEASE_RANKS), 0)
+
+        if match.group('post_number_implicit'):
+            post = int(match.group('post_number_implicit'))
+        elif match.group('post_label'):
+            post = int(match.group('post_number') or 0)
+        else:
+            post = -1
+
+        dev = int(match.group('dev_number') or 0) if match.group('dev_label') else float('inf')
+
+        local = ()
+        if match.group('local'):
+            local = tuple((1, int(part), '') if part.isdigit() else (0, 0, part.lower())
+                          for part in re.split(r'[-_.]', match.group('local')))
+
+        self = super(Version, cls).__new__(
+            cls, (int(match.group('epoch') or 0), tuple(release), pre, post, dev, local))
+        self.public = version.strip()
+        self.legacy = False
+        return self
+
+    def __repr__(self):
+        return '<Version({!r})>'.format(self.public)
+
+    def __str__(self):
+        return self.public
+
+
+def parse_version(version):
+    """Parse a version string, as a legacy version when it isn't a valid PEP 440 version."""
+    return Version(version)
+parse_version.__annotations__ = {'version': str, 'return': Version}
+
+
+class VersionInterval(object):
+    """Range of versions matched by one entry of a :code:`VersionedSerializers.VERSION_MAP`.
+    A bound of ``None`` means the range is unbounded on that side.
+    """
+
+    def __init__(self, serializer, lower=None, lower_inclusive=False, upper=None, upper_inclusive=False):
+        self.serializer = serializer
+        self.lower = lower
+        self.lower_inclusive = lower_inclusive
+        self.upper = upper
+        self.upper_inclusive = upper_inclusive
+
+    @property
+    def sort_key(self):
+        # Inclusive lower bounds sort before exclusive ones on the same version
+        return self.lower is not None, self.lower, not self.lower_inclusive
+
+    def restrict_lower(self, version, inclusive):
+        if self.lower is None or version > self.lower or (version == self.lower and not inclusive):
+            self.lower, self.lower_inclusive = version, inclusive
+
+    def restrict_upper(self, version, inclusive):
+        if self.upper is None or version < self.upper or (version == self.upper and not inclusive):
+            self.upper, self.upper_inclusive = version, inclusive
+
+    def is_empty(self):
+        if self.lower is None or self.upper is None:
+            return False
+        return self.lower > self.upper or (
+            self.lower == self.upper and not (self.lower_inclusive and self.upper_inclusive))
+
+    def contains(self, version):
+        if self.lower is not None:
+            if version < self.lower or (version == self.lower and not self.lower_inclusive):
+                return False
+        if self.upper is not None:
+            if version > self.upper or (version == self.upper and not self.upper_inclusive):
+                return False
+        return True
+
+
+class VersionedSerializersMeta(type):
+    """Compiles the ``VERSION_MAP`` of every :code:`VersionedSerializers` when the class is defined,
+    so that resolving a request version doesn't have to parse it again.
+    """
+
+    def __init__(cls, name, bases, attrs):
+        super(VersionedSerializersMeta, cls).__init__(name, bases, attrs)
+        cls._version_intervals = cls.compile_version_map(getattr(cls, 'VERSION_MAP', ()))
+        cls._version_interval_keys = [interval.sort_key for interval in cls._version_intervals]
+        cls._resolved_versions = {}
+
+    def compile_version_map(cls, version_map):
+        intervals = []
+        for allowed_version, serializer in version_map:
+            interval = VersionInterval(serializer)
+            for distinct_version in allowed_version.split(','):
+                distinct_version = distinct_version.strip()
+                operator_string = distinct_version[:2]
+                if operator_string not in cls.OPERATORS:
+                    operator_string = distinct_version[:1]
+                if operator_string not in cls.OPERATORS:
+                    # case #1
+                    operator_string = ''
+                version = parse_version(distinct_version[len(operator_string):].strip())
+
+                if operator_string in ('', '=='):
+                    interval.restrict_lower(version, True)
+                    interval.restrict_upper(version, True)
+                elif operator_string.startswith('>'):
+                    interval.restrict_lower(version, operator_string == '>=')
+                else:
+                    interval.restrict_upper(version, operator_string == '<=')
+
+            if interval.is_empty():
+                raise ImproperlyConfigured(
+                    '{}.VERSION_MAP: {!r} does not match any version'.format(cls.__name__, allowed_version))
+            intervals.append(interval)
+
+        intervals.sort(key=operator.attrgetter('sort_key'))
+        for previous, current in zip(intervals, intervals[1:]):
+            if (previous.upper is None or current.lower is None or previous.upper > current.lower or
+                    (previous.upper == current.lower and previous.upper_inclusive and current.lower_inclusive)):
+                raise ImproperlyConfigured('{}.VERSION_MAP: {} and {} match overlapping versions'.format(
+                    cls.__name__, previous.serializer.__name__, current.serializer.__name__))
+            if previous.upper < current.lower or not (previous.upper_inclusive or current.lower_inclusive):
+                warnings.warn('{}.VERSION_MAP: no serializer matches versions between {} and {}'.format(
+                    cls.__name__, previous.serializer.__name__, current.serializer.__name__), RuntimeWarning)
+        return intervals
+
+
+_VersionedSerializersBase = VersionedSerializersMeta('_VersionedSerializersBase', (object,), {'OPERATORS': {}})
+
+
+class VersionedSerializers(_VersionedSerializersBase):
+    """Adapted from https://github.com/avanov/Rhetoric/ :)
+    """
+    OPERATORS = {
+        '>': operator.gt,
+        '<': operator.lt,
+        '==': operator.eq,
+        '>=': operator.ge,
+        '<=': operator.le
+    }
+
+    """
+    A map of version and serializer definition
+    May be represented in the following form
+
+    1. ``VERSION``
+    2. ``==VERSION`` (the same as above)
+    3. ``>VERSION``
+    4. ``<VERSION``
+    5. ``>=VERSION``
+    6. ``<=Version``
+    7. Comma-separated list of 1-7 evaluated as AND
+
+    Must override in subclass, for example
+
+    VERSION_MAP = (
+        ('>1.3, <=1.6', MeSerializer16)
+        ('>1.6', MeSerializer)
+    )
+
+    The ranges may not overlap, which is checked when the class is defined.
+    """
+    VERSION_MAP = ()
+
+    # Bounds the memo of resolved versions, request versions may come straight from the URL
+    MAX_RESOLVED_VERSIONS = 256
+
+    @classmethod
+    def get(cls, request_version):
+        try:
+            return cls._resolved_versions[request_version]
+        except (KeyError, TypeError):
+            pass
+
+        serializer = cls.resolve(request_version)
+        if serializer is None:
+            raise ValueError('Invalid request version {}'.format(request_version))
+        if len(cls._resolved_versions) < cls.MAX_RESOLVED_VERSIONS:
+            cls._resolved_versions[request_version] = serializer
+        return serializer
+    get.__func__.__annotations__ = {'request_version': str}
+
+    @classmethod
+    def resolve(cls, request_version):
+        """Return the serializer matching ``request_version``, or ``None`` if there is none."""
+        if not isinstance(request_version, string_types) or not cls._version_intervals:
+            return None
+        try:
+            version = parse_version(request_version)
+        except ValueError:
+            return None
+        index = bisect.bisect_right(cls._version_interval_keys, (True, version, False)) - 1
+        if index < 0:
+            return None
+        interval = cls._version_intervals[index]
+        return interval.serializer if interval.contains(version) else None
+    resolve.__func__.__annotations__ = {'request_version': str}
@@ -1,10 +1,20 @@
 # coding=utf-8
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 from rest_framework import response, permissions
+from rest_framework.fields import BooleanField
 from rest_framework.renderers import CoreJSONRenderer
 from rest_framework.views import APIView
 
+from drf_openapi.cache import CachedSchema, schema_cache, shared_schema_cache
 from drf_openapi.codec import OpenAPIRenderer, SwaggerUIRenderer
 from drf_openapi.entities import OpenApiSchemaGenerator
+from drf_openapi.prebuild import load_schema
+from drf_openapi.profiling import SORT_KEYS, profile_schema
+from drf_openapi.settings import openapi_settings
+from drf_openapi.signals import schema_timings
+from drf_openapi.timing import NULL_TIMER, SchemaTimer
 
 
 class SchemaView(APIView):
@@ -12,11 +22,206 @@ class SchemaView(APIView):
     permission_classes = (permissions.IsAdminUser,)
     url = ''
     title = 'API Documentation'
+    # Set to None to regenerate the schema on every request
+    schema_cache = schema_cache
+    # Encoded schemas shared between processes, used when the SHARED_SCHEMA_CACHE setting is set
+    shared_schema_cache = shared_schema_cache
+    # Directory of prebuilt schemas to serve instead of generating them, defaults to the SCHEMA_DIR setting
+    schema_dir = None
+    timer = NULL_TIMER
+
+    def initial(self, request, *args, **kwargs):
+        if openapi_settings.TIMINGS:
+            self.timer = SchemaTimer()
+        super(SchemaView, self).initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(SchemaView, self).finalize_response(request, response, *args, **kwargs)
+        if self.timer:
+            response['Server-Timing'] = self.timer.as_server_timing()
+            self.report_timings(request, kwargs.get('version'))
+        return response
+
+    def report_timings(self, request, version):
+        """Hand the recorded timings over to the ``schema_timings`` receivers and the TIMINGS_CALLBACK."""
+        schema_timings.send(sender=self.__class__, timer=self.timer, request=request, version=version)
+        if openapi_settings.TIMINGS_CALLBACK is not None:
+            openapi_settings.TIMINGS_CALLBACK(self.timer, request=request, version=version)
 
     def get(self, request, version):
-        generator = OpenApiSchemaGenerator(
+        if request.query_params.get('profile') in BooleanField.TRUE_VALUES and self.can_profile(request):
+            return self.get_profile_response(request, version)
+
+        if not isinstance(request.accepted_renderer, OpenAPIRenderer):
+            return response.Response(self.get_schema_entry(request, version).document)
+
+        encoded = self.get_prebuilt_schema(request, version)
+        if encoded is None and self.shared_schema_cache:
+            encoded = self.get_shared_schema(request, version)
+        if encoded is None:
+            # The OpenAPI document only depends on the URL for its host and schemes, spliced into a shared encoding
+            entry = self.get_schema_entry(request, version, host_independent=True)
+            if entry.empty:
+                return response.Response(None)
+            # Immutable schemas may only be kept encoded
+            if openapi_settings.STREAM_SCHEMA and entry.document is not None:
+                return self.get_streaming_response(request, entry.document)
+            encoded = entry.get_encoded_for_url(
+                request.accepted_renderer, self.get_schema_url(request), timer=self.timer)
+
+        # Serve the OpenAPI document from its cached encoding, with validators for conditional requests
+        res = response.Response(encoded) if encoded.contiguous else self.get_buffered_response(request, encoded)
+        res['ETag'] = encoded.etag
+        res['Last-Modified'] = http_date(encoded.last_modified)
+        if encoded.content_encoding:
+            res['Content-Encoding'] = encoded.content_encoding
+        if self.get_schema_dir():
+            patch_vary_headers(res, ('Accept-Encoding',))
+        return get_conditional_response(
+            request, etag=encoded.etag, last_modified=int(encoded.last_modified), response=res)
+
+    def can_profile(self, request):
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_staff)
+
+    def get_profile_response(self, request, version):
+        """
+        Return the per-endpoint cost report of the schema, generated afresh for this request,
+        sorted by the ``sort`` query parameter.
+        """
+        sort = request.query_params.get('sort', 'time')
+        if sort not in SORT_KEYS:
+            return JsonResponse({'detail': 'Invalid sort, choose one of {}'.format(', '.join(SORT_KEYS))}, status=400)
+        profile = profile_schema(version, request=request, url=self.url, title=self.title, sort=sort)
+        return JsonResponse(profile.as_dict())
+
+    def get_streaming_response(self, request, document):
+        """Stream the OpenAPI document to the client as it gets encoded, instead of encoding it upfront."""
+        renderer = request.accepted_renderer
+        return StreamingHttpResponse(
+            renderer.iterencode(document, url=self.get_schema_url(request)), content_type=renderer.media_type)
+
+    def get_buffered_response(self, request, encoded):
+        """Serve an encoded schema held in buffers other than a bytes object, e.g. mapped in memory, chunk by chunk."""
+        renderer = request.accepted_renderer
+        res = StreamingHttpResponse(encoded.iter_chunks(), content_type=renderer.media_type)
+        res['Content-Length'] = encoded.size
+        return res
+
+    def get_schema_dir(self):
+        return self.schema_dir or openapi_settings.SCHEMA_DIR
+
+    def get_prebuilt_schema(self, request, version):
+        """
+        Return the schema prebuilt by the ``build_openapi_schema`` command for ``version``,
+        gzipped if the client accepts it, or ``None`` when there is none to serve.
+        """
+        schema_dir = self.get_schema_dir()
+        if not schema_dir:
+            return None
+        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            encoded = load_schema(schema_dir, version, compressed=True)
+            if encoded is not None:
+                return encoded
+        return load_schema(schema_dir, version)
+
+    def get_shared_schema(self, request, version):
+        """
+        Return the schema for this request from the cache shared by every process,
+        generating and storing it first if no process did yet.
+        """
+        renderer = request.accepted_renderer
+        key = self.get_cache_key(request, version, host_independent=True)
+        schema = self.shared_schema_cache.get(key, renderer.__class__)
+        if schema is None:
+            with self.shared_schema_cache.lock(key, renderer.__class__):
+                # Stored by another process in the meantime
+                schema = self.shared_schema_cache.get(key, renderer.__class__)
+                if schema is None:
+                    entry = self.get_schema_entry(request, version, host_independent=True)
+                    if entry.empty:
+                        return None
+                    schema = entry.get_host_independent(renderer, timer=self.timer)
+                    self.shared_schema_cache.set(key, renderer.__class__, schema)
+        return schema.for_url(self.get_schema_url(request), copy=not openapi_settings.IMMUTABLE_SCHEMAS)
+
+    def get_schema_url(self, request):
+        return self.url or request.build_absolute_uri()
+
+    def get_schema_entry(self, request, version, host_independent=False):
+        """
+        Return the :code:`CachedSchema` of the schema for this request.
+        With ``host_independent``, the URL of its document may be that of another request.
+        """
+        if self.schema_cache is None:
+            return CachedSchema(self.generate_schema(request, version))
+
+        if openapi_settings.FILTER_BY_PERMISSIONS:
+            return self.get_filtered_schema_entry(request, version, host_independent)
+
+        key = self.get_cache_key(request, version, host_independent)
+        return self.schema_cache.get_or_create(key, lambda: self.generate_schema(request, version))
+
+    def get_filtered_schema_entry(self, request, version, host_independent=False):
+        """
+        Return the schema of the endpoints the user may access, filtered out of the links of every endpoint,
+        which are generated once per version and cached along with the filtered documents.
+        """
+        link_tree = self.get_link_tree(version)
+        if link_tree is None:
+            return CachedSchema(None)
+
+        key = self.get_cache_key(request, version, host_independent)
+        fingerprint = key[-1]
+        generator = self.get_generator(version)
+        return self.schema_cache.get_or_create(
+            key, lambda: generator.get_filtered_schema(link_tree, fingerprint, request))
+
+    def get_link_tree(self, version):
+        """Return the links of every endpoint of ``version``, shared by every user, or ``None`` if there is none."""
+        # Refreshed from the version alone in the background, without the request nor its timer
+        return self.schema_cache.get_or_create(
+            (version, 'links'), lambda: self.get_generator(version).get_link_tree(),
+            refresh=self.get_generator(version, timer=NULL_TIMER).get_link_tree).document
+
+    def get_permission_fingerprint(self, request, version):
+        """Return which endpoints of ``version`` the user may access, see ``get_permission_fingerprint``."""
+        link_tree = self.get_link_tree(version)
+        if link_tree is None:
+            return ''
+        return self.get_generator(version).get_permission_fingerprint(link_tree, request)
+
+    def get_generator(self, version, timer=None):
+        return OpenApiSchemaGenerator(
             version=version,
             url=self.url,
-            title=self.title
+            title=self.title,
+            timer=self.timer if timer is None else timer
         )
-        return response.Response(generator.get_schema(request))
+
+    def generate_schema(self, request, version):
+        return self.get_generator(version).get_schema(request)
+
+    def get_cache_key(self, request, version, host_independent=False):
+        """
+        Return the key identifying the schema generated for this request.
+        The document embeds the request URL, unless ``host_independent``,
+        and only lists the endpoints the user may access, so both are part of the key along with the version.
+        With FILTER_BY_PERMISSIONS, the user is identified by the endpoints they may access, so that users with the
+        same access share the same key.
+        """
+        if openapi_settings.FILTER_BY_PERMISSIONS and self.schema_cache is not None:
+            access = self.get_permission_fingerprint(request, version)
+        else:
+            user = getattr(request, 'user', None)
+            access = user.pk if user is not None and user.is_authenticated else None
+        url = None if host_independent else self.get_schema_url(request)
+        return version, url, self.title, access
+
+    @classmethod
+    def invalidate_cache(cls, version=None):
+        """Drop the cached schemas of ``version``, or of every version when none is given."""
+        if cls.schema_cache is not None:
+            cls.schema_cache.invalidate(version)
+        if cls.shared_schema_cache is not None:
+            cls.shared_schema_cache.invalidate(version)
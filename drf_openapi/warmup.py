@@ -0,0 +1,142 @@
+# coding=utf-8
+"""Generate schemas at startup, so that the first requests after a deploy or a worker restart don't pay for it.
+
+:code:`warm_up`, called from the WSGI or ASGI module of the project, fills the cache of the WARMUP_VIEW with the
+schemas of the WARMUP_VERSIONS that requests get served: the links of every endpoint and the schema of anonymous users
+when FILTER_BY_PERMISSIONS is on, otherwise the schema of anonymous users if they may access the view.
+Schemas keyed by user are generated by their first request.
+"""
+import logging
+import threading
+import time
+from timeit import default_timer
+
+from django.apps import apps
+from django.test import RequestFactory
+
+from rest_framework.exceptions import APIException
+
+from drf_openapi.codec import OpenAPIRenderer
+from drf_openapi.settings import openapi_settings
+from drf_openapi.timing import NullTimer
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two checks that every app is ready
+APPS_POLL_INTERVAL = 0.1
+
+# URL of the fake request, host-independent schemas don't depend on it
+WARMUP_URL = 'http://localhost/'
+
+
+class WarmupTimeout(Exception):
+    """Stops generating a schema once the warmup is out of time."""
+
+
+class _DeadlineTimer(NullTimer):
+    """A timer raising :code:`WarmupTimeout` when a phase of the generation starts after ``deadline``."""
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+
+    def phase(self, name):
+        if default_timer() >= self.deadline:
+            raise WarmupTimeout()
+        return self._context
+
+
+def warm_up_version(view_class, version, deadline=None):
+    """
+    Generate the schema of ``version`` into the caches of ``view_class``, as it gets served to anonymous users,
+    and the links of every endpoint with FILTER_BY_PERMISSIONS. Return whether anything was generated:
+    without FILTER_BY_PERMISSIONS, the schema of anonymous users is never served if they may not access the view,
+    e.g. with the default ``IsAdminUser`` permission.
+    Generation stops with :code:`WarmupTimeout` past the ``deadline``, a :code:`timeit.default_timer` time.
+    """
+    view = view_class()
+    view.args, view.kwargs = (), {'version': version}
+    # Set the URL rather than building it from the fake request, whose host may not be allowed
+    view.url = view.url or WARMUP_URL
+    request = view.initialize_request(RequestFactory().get('/'))
+    request.version = version
+    # Encodings are cached per renderer class, use the one of the view
+    request.accepted_renderer = next(
+        (renderer for renderer in view.get_renderers() if isinstance(renderer, OpenAPIRenderer)), OpenAPIRenderer())
+    view.request = request
+    if deadline is not None:
+        view.timer = _DeadlineTimer(deadline)
+
+    filtered = openapi_settings.FILTER_BY_PERMISSIONS and view.schema_cache is not None
+    if not filtered:
+        try:
+            view.check_permissions(request)
+        except APIException:
+            return False
+
+    if view.shared_schema_cache:
+        view.get_shared_schema(request, version)
+    elif view.schema_cache is not None:
+        entry = view.get_schema_entry(request, version, host_independent=True)
+        if not entry.empty:
+            entry.get_host_independent(request.accepted_renderer, timer=view.timer)
+    else:
+        return False
+    return True
+
+
+def _warm_up(versions, view_class, timeout):
+    start = default_timer()
+    deadline = start + timeout
+    warmed_up_versions = 0
+    try:
+        for version in versions:
+            version_start = default_timer()
+            try:
+                if version_start >= deadline:
+                    raise WarmupTimeout()
+                warmed_up = warm_up_version(view_class, version, deadline=deadline)
+            except WarmupTimeout:
+                logger.warning('Schema warmup timed out after %.2fs, skipped version %s and after', timeout, version)
+                return
+            except Exception:
+                logger.exception('Failed to warm up the schema of version %s', version)
+                continue
+            if not warmed_up:
+                logger.warning('Nothing to warm up for version %s, anonymous users may not access %s',
+                               version, view_class.__name__)
+                continue
+            warmed_up_versions += 1
+            logger.info('Warmed up the schema of version %s in %.2fs', version, default_timer() - version_start)
+        logger.info('Warmed up the schemas of %d versions in %.2fs', warmed_up_versions, default_timer() - start)
+    finally:
+        # Database connections are per thread, release the ones this thread opened
+        from django.db import connections
+        connections.close_all()
+
+
+def warm_up(versions=None, view_class=None, timeout=None, wait=True):
+    """
+    Generate the schemas of ``versions`` into the caches of ``view_class``, by default those of the WARMUP_VERSIONS
+    and WARMUP_VIEW settings, in a background thread stopping after ``timeout`` seconds (WARMUP_TIMEOUT by default).
+    With ``wait``, wait for it. Return the thread.
+    Call it from the WSGI or ASGI module of the project, so that only the processes serving requests warm up.
+    """
+    if versions is None:
+        versions = openapi_settings.WARMUP_VERSIONS or []
+    if view_class is None:
+        view_class = openapi_settings.WARMUP_VIEW
+    if timeout is None:
+        timeout = openapi_settings.WARMUP_TIMEOUT
+
+    def run():
+        # The URLconf can only be loaded once every app is ready
+        while not apps.ready:
+            time.sleep(APPS_POLL_INTERVAL)
+        _warm_up(list(versions), view_class, timeout)
+
+    thread = threading.Thread(target=run, name='drf-openapi-warmup')
+    thread.daemon = True
+    thread.start()
+    if wait:
+        thread.join(timeout)
+    return thread
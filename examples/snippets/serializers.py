@@ -1,6 +1,6 @@
 from rest_framework.status import HTTP_400_BAD_REQUEST
 
-from drf_openapi.entities import VersionedSerializers
+from drf_openapi.versioning import VersionedSerializers
 from rest_framework import serializers
 from snippets.models import Snippet, LANGUAGE_CHOICES, STYLE_CHOICES
 
@@ -13,7 +13,9 @@ with open('HISTORY.rst') as history_file:
 
 requirements = [
     'Click>=6.0',
-    'django-rest-swagger==2.1.2'
+    'django-rest-swagger==2.1.2',
+    # concurrent.futures backport, for shadow validation
+    'futures; python_version < "3"',
 ]
 
 setup_requirements = [
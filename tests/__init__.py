@@ -1,3 +1,21 @@
 # -*- coding: utf-8 -*-
 
 """Unit test package for drf_openapi."""
+import django
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(
+        SECRET_KEY='drf_openapi tests',
+        INSTALLED_APPS=[
+            'django.contrib.contenttypes',
+            'django.contrib.auth',
+            'rest_framework',
+            'drf_openapi',
+        ],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        REST_FRAMEWORK={
+            'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning',
+        },
+    )
+    django.setup()
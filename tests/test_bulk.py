@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import copy
+import itertools
+import random
+import unittest
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+
+from drf_openapi.bulk import bulk_serializer
+
+
+def no_thirteen(value):
+    if value == 13:
+        raise DjangoValidationError('Unlucky', code='unlucky')
+
+
+class LuckyField(serializers.IntegerField):
+
+    def to_internal_value(self, data):
+        value = super(LuckyField, self).to_internal_value(data)
+        # Raised outside of run_validators, which would turn it into the error of the item
+        no_thirteen(value)
+        return value
+
+
+class TagSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=5, min_length=2)
+    weight = serializers.FloatField(min_value=0, required=False, allow_null=True)
+
+    def validate_name(self, value):
+        if value == 'bad':
+            raise serializers.ValidationError('No bad tags')
+        return value.upper()
+
+
+class RowSerializer(serializers.Serializer):
+    id = serializers.IntegerField(max_value=100)
+    title = serializers.CharField(max_length=8, allow_blank=True, trim_whitespace=False, required=False)
+    email = serializers.EmailField(required=False)
+    flag = serializers.BooleanField(required=False)
+    kind = serializers.ChoiceField(choices=[(1, 'one'), ('b', 'bee')], allow_blank=True, required=False)
+    nums = serializers.ListField(child=serializers.IntegerField(min_value=0), max_length=3, required=False)
+    checked = serializers.ListField(child=serializers.IntegerField(validators=[no_thirteen]), required=False)
+    lucky = serializers.ListField(child=LuckyField(), required=False)
+    grid = serializers.ListField(child=serializers.ListField(child=LuckyField()), required=False)
+    tags = TagSerializer(many=True, required=False)
+    main = TagSerializer(required=False, allow_null=True)
+    day = serializers.DateField(required=False)
+    alias = serializers.CharField(source='meta.alias', default='x')
+    hidden = serializers.HiddenField(default=7)
+
+    def validate(self, attrs):
+        if attrs.get('id') == 13:
+            raise serializers.ValidationError('Unlucky row')
+        return attrs
+
+
+VALUES = {
+    'id': [1, 100, 101, -5, '7', '7.0', 1.5, True, None, 'x', [1], 13],
+    'title': ['', '  ', 'abc', 'abcdefghi', 5, 2.5, False, None, ['a'], 'a\x00'],
+    'email': ['a@b.co', 'nope', '', None, 3],
+    'flag': [True, False, 'true', 0, 2, None, [], 'x'],
+    'kind': [1, '1', 'b', 'c', '', None, True, 1.0],
+    'nums': [[], [1, 2], [1, -1, 'a'], [1, 2, 3, 4], 'x', {}, None, [None]],
+    'checked': [[], [1, 2], [1, 13], [13, 'a'], ['a'], 'x', None],
+    'lucky': [[], [1, 2], [1, 13], [13, 'a'], ['a'], 'x', None],
+    'grid': [[], [[1], [2]], [[1], [13]], [[13], ['a']], [['a']], [1], 'x', None],
+    'tags': [[], [{'name': 'ab'}], [{'name': 'bad'}, {'name': 'x'}], [{'weight': -1}], 'x', None, [1],
+             [{'name': 'abc', 'weight': '2'}]],
+    'main': [{'name': 'ok'}, {'name': 'bad'}, None, 'x', {}, {'name': 'abcdef'}],
+    'day': ['2020-01-01', 'nope', 5, None],
+    'alias': ['a', None, 3],
+    'hidden': [1],
+}
+
+
+def normalize(value):
+    """Return ``value`` with the codes of its errors and the types of its values, to compare them."""
+    if isinstance(value, ErrorDetail):
+        return 'error', str(value), value.code
+    if isinstance(value, dict):
+        return 'dict', sorted((str(key), normalize(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return 'list', [normalize(item) for item in value]
+    return type(value).__name__, repr(value)
+
+
+class BulkSerializerTest(unittest.TestCase):
+
+    def assertValidatesLikeListSerializer(self, serializer_class, data, partial=False):
+        expected = serializer_class(data=copy.deepcopy(data), many=True, partial=partial)
+        actual = bulk_serializer(serializer_class)(data=copy.deepcopy(data), many=True, partial=partial)
+        valid = expected.is_valid()
+        self.assertEqual(actual.is_valid(), valid, data)
+        self.assertEqual(normalize(actual.errors), normalize(expected.errors), data)
+        if valid:
+            self.assertEqual(normalize(actual.validated_data), normalize(expected.validated_data), data)
+
+    def test_each_value(self):
+        for name, values in VALUES.items():
+            for value, partial in itertools.product(values, (False, True)):
+                self.assertValidatesLikeListSerializer(RowSerializer, [{'id': 1, name: value}], partial)
+                self.assertValidatesLikeListSerializer(RowSerializer, [{'id': 1}, {name: value}], partial)
+
+    def test_random_rows(self):
+        rng = random.Random(1)
+
+        def row():
+            if rng.random() < 0.05:
+                return rng.choice([None, 'x', [1], 5])
+            return dict((name, rng.choice(values)) for name, values in VALUES.items() if rng.random() < 0.7)
+
+        for _ in range(300):
+            data = [row() for _ in range(rng.randint(0, 6))]
+            self.assertValidatesLikeListSerializer(RowSerializer, data, partial=rng.random() < 0.5)
+
+    def test_not_a_list(self):
+        for data in ({}, 'x', None, [], ({'id': 1},)):
+            self.assertValidatesLikeListSerializer(RowSerializer, data)
+
+    def test_django_errors_of_list_children(self):
+        serializer = bulk_serializer(RowSerializer)(data=[{'id': 1, 'lucky': [1, 13]}, {'id': 2}], many=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors, [{'lucky': ['Unlucky']}, {}])
+
+    def test_bulk_serializer_is_cached(self):
+        bulk = bulk_serializer(RowSerializer)
+        self.assertIs(bulk_serializer(RowSerializer), bulk)
+        self.assertIs(bulk_serializer(bulk), bulk)
+
+
+if __name__ == '__main__':
+    unittest.main()
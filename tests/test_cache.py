@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import unittest
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from drf_openapi.cache import CachedSchema, SchemaCache, cross_process_lock
+from drf_openapi.views import SchemaView
+
+
+def expire(cache, key, seconds):
+    """Age the entry of ``key`` by ``seconds``."""
+    cache._entries[key].created -= seconds
+
+
+class SchemaCacheTest(unittest.TestCase):
+
+    def test_timeout(self):
+        cache = SchemaCache(timeout=60, max_entries=None)
+        entry = cache.set(('1.0',), 'document')
+        self.assertIs(cache.get(('1.0',)), entry)
+        expire(cache, ('1.0',), 59)
+        self.assertIs(cache.get(('1.0',)), entry)
+        expire(cache, ('1.0',), 1)
+        self.assertIsNone(cache.get(('1.0',)))
+        self.assertEqual(len(cache), 0)
+
+    def test_no_timeout(self):
+        cache = SchemaCache(timeout=None, max_entries=None)
+        entry = cache.set(('1.0',), 'document')
+        expire(cache, ('1.0',), 10 ** 6)
+        self.assertIs(cache.get(('1.0',)), entry)
+
+    def test_evicts_least_recently_used(self):
+        cache = SchemaCache(timeout=None, max_entries=2)
+        cache.set(('1.0',), 'one')
+        cache.set(('2.0',), 'two')
+        cache.get(('1.0',))
+        cache.set(('3.0',), 'three')
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(('2.0',)))
+        self.assertEqual(cache.get(('1.0',)).document, 'one')
+        self.assertEqual(cache.get(('3.0',)).document, 'three')
+
+        # Hits of get_or_create count as uses too
+        cache.get_or_create(('1.0',), lambda: 'regenerated')
+        cache.set(('4.0',), 'four')
+        self.assertIsNone(cache.get(('3.0',)))
+        self.assertEqual(cache.get(('1.0',)).document, 'one')
+
+    def test_invalidate(self):
+        cache = SchemaCache(timeout=None, max_entries=None)
+        for key in (('1.0',), ('1.0', 'user'), ('2.0',)):
+            cache.set(key, key)
+        cache.invalidate('1.0')
+        self.assertEqual(len(cache), 1)
+        self.assertIsNotNone(cache.get(('2.0',)))
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+    def test_get_or_create(self):
+        cache = SchemaCache(timeout=60, max_entries=None, stale_timeout=0)
+        calls = []
+
+        def generate():
+            calls.append(None)
+            return 'document {}'.format(len(calls))
+
+        entry = cache.get_or_create(('1.0',), generate)
+        self.assertEqual(entry.document, 'document 1')
+        self.assertIs(cache.get_or_create(('1.0',), generate), entry)
+        expire(cache, ('1.0',), 60)
+        self.assertEqual(cache.get_or_create(('1.0',), generate).document, 'document 2')
+        self.assertEqual(len(calls), 2)
+
+    def test_get_or_create_at_the_timeout(self):
+        class ExpiringCache(SchemaCache):
+            """Finds entries live once, and expired from then on, as if the timeout was reached in between."""
+            checks = 0
+
+            def _is_expired(self, entry, now):
+                self.checks += 1
+                return self.checks > 1
+
+        cache = ExpiringCache(timeout=60, max_entries=None)
+        entry = cache.set(('1.0',), 'document')
+        self.assertIs(cache.get_or_create(('1.0',), lambda: 'regenerated'), entry)
+
+
+class BlockingGenerator(object):
+    """Generates documents once released, counting its calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        self.started.set()
+        self.release.wait(5)
+        return 'document {}'.format(calls)
+
+
+def run_threads(count, target):
+    results = [None] * count
+
+    def run(index):
+        results[index] = target()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def join(threads):
+    for thread in threads:
+        thread.join(5)
+        assert not thread.is_alive()
+
+
+class ConcurrencyTest(unittest.TestCase):
+
+    def test_single_flight(self):
+        cache = SchemaCache(timeout=60, max_entries=None)
+        generate = BlockingGenerator()
+        threads, results = run_threads(8, lambda: cache.get_or_create(('1.0',), generate))
+        self.assertTrue(generate.started.wait(5))
+        # Let the others pile up behind the generation
+        time.sleep(0.1)
+        generate.release.set()
+        join(threads)
+        self.assertEqual(generate.calls, 1)
+        self.assertEqual(set(entry.document for entry in results), {'document 1'})
+        self.assertTrue(all(entry is results[0] for entry in results))
+        self.assertEqual(cache._generating, {})
+
+    def test_serves_stale_while_refreshing(self):
+        cache = SchemaCache(timeout=60, max_entries=None, stale_timeout=None)
+        stale = cache.set(('1.0',), 'stale')
+        expire(cache, ('1.0',), 61)
+        refresh = BlockingGenerator()
+        generate = BlockingGenerator()
+        threads, results = run_threads(4, lambda: cache.get_or_create(('1.0',), generate, refresh=refresh))
+        join(threads)
+        self.assertTrue(all(entry is stale for entry in results))
+        self.assertTrue(refresh.started.wait(5))
+        self.assertEqual(generate.calls, 0)
+
+        refresh.release.set()
+        for _ in range(50):
+            if ('1.0',) not in cache._refreshing:
+                break
+            time.sleep(0.1)
+        self.assertEqual(refresh.calls, 1)
+        self.assertEqual(cache.get(('1.0',)).document, 'document 1')
+
+    def test_stale_without_refresh(self):
+        cache = SchemaCache(timeout=60, max_entries=None, stale_timeout=None)
+        stale = cache.set(('1.0',), 'stale')
+        expire(cache, ('1.0',), 61)
+        generate = BlockingGenerator()
+        first, first_result = run_threads(1, lambda: cache.get_or_create(('1.0',), generate))
+        self.assertTrue(generate.started.wait(5))
+        # The first caller regenerates it, the others get the expired schema meanwhile
+        others, results = run_threads(4, lambda: cache.get_or_create(('1.0',), generate))
+        join(others)
+        self.assertTrue(all(entry is stale for entry in results))
+        generate.release.set()
+        join(first)
+        self.assertEqual(first_result[0].document, 'document 1')
+        self.assertEqual(generate.calls, 1)
+        self.assertEqual(cache._refreshing, set())
+
+    def test_expired_beyond_the_stale_timeout(self):
+        cache = SchemaCache(timeout=60, max_entries=None, stale_timeout=10)
+        cache.set(('1.0',), 'stale')
+        expire(cache, ('1.0',), 71)
+        refresh = BlockingGenerator()
+        self.assertEqual(cache.get_or_create(('1.0',), lambda: 'document', refresh=refresh).document, 'document')
+        self.assertEqual(refresh.calls, 0)
+
+    def test_failed_refresh(self):
+        cache = SchemaCache(timeout=60, max_entries=None, stale_timeout=None)
+        stale = cache.set(('1.0',), 'stale')
+        expire(cache, ('1.0',), 61)
+        done = threading.Event()
+
+        def refresh():
+            try:
+                raise ValueError('Boom')
+            finally:
+                done.set()
+
+        self.assertIs(cache.get_or_create(('1.0',), None, refresh=refresh), stale)
+        self.assertTrue(done.wait(5))
+        for _ in range(50):
+            if not cache._refreshing:
+                break
+            time.sleep(0.1)
+        # Still served, and refreshed again by the next caller
+        self.assertIs(cache.get_or_create(('1.0',), None, refresh=refresh), stale)
+
+
+@override_settings(DRF_OPENAPI={'SCHEMA_LOCK_CACHE': 'default', 'SCHEMA_LOCK_TIMEOUT': 5})
+class CrossProcessLockTest(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_excludes_other_holders(self):
+        holders = []
+        overlaps = []
+
+        def hold():
+            with cross_process_lock('schema'):
+                holders.append(None)
+                if len(holders) > 1:
+                    overlaps.append(None)
+                time.sleep(0.05)
+                holders.pop()
+
+        threads, _ = run_threads(4, hold)
+        join(threads)
+        self.assertEqual(overlaps, [])
+
+    def test_expires_after_the_timeout(self):
+        with override_settings(DRF_OPENAPI={'SCHEMA_LOCK_CACHE': 'default', 'SCHEMA_LOCK_TIMEOUT': 0.3}):
+            crashed = cross_process_lock('schema').__enter__()
+            start = time.time()
+            taken_over = cross_process_lock('schema').__enter__()
+            self.assertGreaterEqual(time.time() - start, 0.25)
+            self.assertEqual(caches['default'].get(taken_over.key), taken_over._token)
+            # The holder whose lock expired doesn't release the lock taken over
+            crashed.__exit__(None, None, None)
+            self.assertEqual(caches['default'].get(taken_over.key), taken_over._token)
+            taken_over.__exit__(None, None, None)
+            self.assertIsNone(caches['default'].get(taken_over.key))
+
+    def test_no_lock(self):
+        with override_settings(DRF_OPENAPI={'SCHEMA_LOCK_CACHE': None}):
+            with cross_process_lock('schema'):
+                with cross_process_lock('schema'):
+                    pass
+
+
+class BlockingRenderer(object):
+    """Encodes documents once released, recording the documents it encodes."""
+
+    def __init__(self):
+        self.documents = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def encode_host_independent(self, document, timer=None):
+        self.documents.append(document)
+        self.started.set()
+        self.release.wait(5)
+        return EncodedDocument(document)
+
+
+class EncodedDocument(object):
+
+    def __init__(self, document):
+        self.document = document
+
+
+class CachedSchemaTest(SimpleTestCase):
+
+    def encode_concurrently(self):
+        entry = CachedSchema({'paths': {}})
+        renderer = BlockingRenderer()
+        threads, results = run_threads(8, lambda: entry.get_host_independent(renderer))
+        self.assertTrue(renderer.started.wait(5))
+        time.sleep(0.1)
+        renderer.release.set()
+        join(threads)
+        self.assertEqual(renderer.documents, [{'paths': {}}])
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(results[0].last_modified, entry.created)
+        return entry
+
+    def test_encodes_once(self):
+        self.assertIsNotNone(self.encode_concurrently().document)
+
+    @override_settings(DRF_OPENAPI={'IMMUTABLE_SCHEMAS': True})
+    def test_drops_the_document_once_encoded(self):
+        self.assertIsNone(self.encode_concurrently().document)
+
+
+class InvalidateCacheTest(unittest.TestCase):
+
+    def test_invalidate_cache(self):
+        class CachedSchemaView(SchemaView):
+            schema_cache = SchemaCache(timeout=None, max_entries=None)
+            shared_schema_cache = None
+
+        cache = CachedSchemaView.schema_cache
+        cache.set(('1.0', None), 'one')
+        cache.set(('2.0', None), 'two')
+        CachedSchemaView.invalidate_cache('1.0')
+        self.assertIsNone(cache.get(('1.0', None)))
+        self.assertIsNotNone(cache.get(('2.0', None)))
+        CachedSchemaView.invalidate_cache()
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+from collections import OrderedDict
+
+from django.conf.urls import url
+from django.utils.functional import Promise
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_openapi.codec import OpenAPICodec, _generate_openapi_object
+from drf_openapi.encoders import JSON_ENCODERS, _is_installed
+from drf_openapi.entities import OpenApiSchemaGenerator
+from drf_openapi.utils import view_config
+
+
+class TagSerializer(serializers.Serializer):
+    name = serializers.CharField(help_text='Name of the tag')
+
+
+class ItemSerializer(serializers.Serializer):
+    """An item"""
+    id = serializers.IntegerField(read_only=True)
+    title = serializers.CharField(max_length=100)
+    tags = TagSerializer(many=True, help_text='Tags of the item')
+    main_tag = TagSerializer(required=False, help_text=gettext_lazy('Main tag of the item'))
+    ratio = serializers.FloatField(required=False, help_text=gettext_lazy('Ratio of the item'))
+
+    class Meta:
+        error_status_codes = {404: gettext_lazy('Not found')}
+
+
+class ItemList(APIView):
+    """List items, or create an item."""
+    pagination_class = PageNumberPagination
+
+    @view_config(response_serializer=ItemSerializer)
+    def get(self, request, version):
+        return Response([])
+
+    @view_config(request_serializer=ItemSerializer, response_serializer=ItemSerializer)
+    def post(self, request, version):
+        return Response({})
+
+
+class ItemDetail(APIView):
+    """Return an item."""
+
+    @view_config(response_serializer=ItemSerializer)
+    def get(self, request, version, pk):
+        return Response({})
+
+
+urlpatterns = [
+    url(r'^(?P<version>[0-9.]+)/items/$', ItemList.as_view()),
+    url(r'^(?P<version>[0-9.]+)/items/(?P<pk>[0-9]+)/$', ItemDetail.as_view()),
+]
+
+ENCODERS = sorted(name for name in JSON_ENCODERS if name == 'json' or _is_installed(name))
+
+
+def encode_natively(data, compact=False):
+    """Encoder without a hook for other types, like ujson."""
+    return json.dumps(data).encode('utf-8')
+
+
+def iter_values(data):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield key
+            for item in iter_values(value):
+                yield item
+    elif isinstance(data, (list, tuple)):
+        for value in data:
+            for item in iter_values(value):
+                yield item
+    else:
+        yield data
+
+
+class IterencodeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.document = OpenApiSchemaGenerator(
+            version='1.0', title='Items', url='https://api.example.com/', patterns=urlpatterns).get_schema(public=True)
+
+    def assertStreamedAsEncoded(self, **options):
+        for encoder in ENCODERS:
+            for compact in (False, True):
+                codec = OpenAPICodec()
+                encoded = codec.encode(self.document, encoder=encoder, compact=compact, **options)
+                # Small chunks, to cut the paths in several chunks
+                streamed = b''.join(
+                    codec.iterencode(self.document, encoder=encoder, compact=compact, chunk_size=1, **options))
+                self.assertEqual(streamed, encoded, '{} encoder, compact={}'.format(encoder, compact))
+                json.loads(streamed.decode('utf-8'))
+
+    def test_streamed_as_encoded(self):
+        self.assertStreamedAsEncoded()
+
+    def test_streamed_as_encoded_with_definitions(self):
+        self.assertStreamedAsEncoded(use_definitions=True)
+
+    def test_streamed_as_encoded_with_extra(self):
+        extra = OrderedDict([
+            ('securityDefinitions', {'basic': {'type': 'basic'}}),
+            ('definitions', {'Error': {'type': 'object'}}),
+            ('info', {'title': 'Custom', 'version': '1.0'}),
+        ])
+        self.assertStreamedAsEncoded(extra=extra)
+        self.assertStreamedAsEncoded(extra=extra, use_definitions=True)
+
+    def test_streamed_as_encoded_with_extra_paths(self):
+        self.assertStreamedAsEncoded(extra={'paths': {}}, use_definitions=True)
+
+
+class EncodeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.document = OpenApiSchemaGenerator(
+            version='1.0', title='Items', url='https://api.example.com/', patterns=urlpatterns).get_schema(public=True)
+
+    def test_native_types(self):
+        for use_definitions in (False, True):
+            data = _generate_openapi_object(self.document, use_definitions=use_definitions)
+            self.assertFalse([value for value in iter_values(data) if isinstance(value, Promise)])
+
+    def test_lazy_help_texts(self):
+        for encoder in ENCODERS + ['tests.test_codec.encode_natively']:
+            for use_definitions in (False, True):
+                encoded = OpenAPICodec().encode(self.document, encoder=encoder, use_definitions=use_definitions)
+                self.assertIn(b'Main tag of the item', encoded)
+                self.assertIn(b'Ratio of the item', encoded)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from drf_openapi.prebuild import build_schema, get_schema_path, load_schema
+from tests.urls import CountingOpenAPIRenderer, CountingSchemaView
+
+
+@override_settings(ROOT_URLCONF='tests.urls', ALLOWED_HOSTS=['testserver'])
+class PrebuiltSchemaTest(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        CountingSchemaView.invalidate_cache()
+        CountingOpenAPIRenderer.encoded = 0
+
+    def build(self, *versions):
+        out = io.StringIO()
+        args = ['--output-dir', self.directory, '--processes', '1']
+        for version in versions:
+            args.extend(['--api-version', version])
+        call_command('build_openapi_schema', *args, stdout=out)
+        return out.getvalue()
+
+    def get(self, **headers):
+        with override_settings(DRF_OPENAPI={'SCHEMA_DIR': self.directory}):
+            return self.client.get('/v1.0/schema/', {'format': 'openapi'}, **headers)
+
+    def test_build(self):
+        output = self.build('1.0', '2.0')
+        for version in ('1.0', '2.0'):
+            self.assertIn('Version {}: '.format(version), output)
+            path = get_schema_path(self.directory, version)
+            with open(path, 'rb') as schema_file:
+                content = schema_file.read()
+            with gzip.open(path + '.gz', 'rb') as schema_file:
+                self.assertEqual(schema_file.read(), content)
+            schema = json.loads(content.decode('utf-8'))
+            self.assertIn('/v{}/snippets/'.format(version), schema['paths'])
+            # Minified
+            self.assertNotIn(b', ', content)
+
+    def test_serves_prebuilt_schemas(self):
+        self.build('1.0')
+        path = get_schema_path(self.directory, '1.0')
+        with open(path, 'rb') as schema_file:
+            content = schema_file.read()
+        with open(path + '.gz', 'rb') as schema_file:
+            compressed = schema_file.read()
+
+        res = self.get()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, content)
+        self.assertNotIn('Content-Encoding', res)
+        self.assertIn('Accept-Encoding', res['Vary'])
+
+        res = self.get(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, compressed)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=res['ETag'], HTTP_ACCEPT_ENCODING='gzip').status_code, 304)
+        # Served from the files, never generated
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 0)
+        self.assertEqual(len(CountingSchemaView.schema_cache), 0)
+
+    def test_serves_mapped_schemas(self):
+        self.build('1.0')
+        with open(get_schema_path(self.directory, '1.0'), 'rb') as schema_file:
+            content = schema_file.read()
+        with override_settings(DRF_OPENAPI={'SCHEMA_DIR': self.directory, 'SCHEMA_MMAP': True}):
+            res = self.client.get('/v1.0/schema/', {'format': 'openapi'})
+        self.assertEqual(b''.join(res.streaming_content), content)
+
+    def test_generates_missing_versions(self):
+        self.build('2.0')
+        res = self.get()
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('/v1.0/snippets/', json.loads(res.content.decode('utf-8'))['paths'])
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 1)
+
+    def test_load_schema(self):
+        self.assertIsNone(load_schema(self.directory, '1.0'))
+        self.assertIsNone(load_schema(self.directory, '../1.0'))
+        with override_settings(ROOT_URLCONF='tests.urls'):
+            build_schema('1.0', self.directory)
+        loaded = load_schema(self.directory, '1.0')
+        self.assertIs(load_schema(self.directory, '1.0'), loaded)
+        self.assertEqual(load_schema(self.directory, '1.0', compressed=True).content_encoding, 'gzip')
+
+        # Reloaded once rebuilt
+        path = get_schema_path(self.directory, '1.0')
+        with open(path, 'wb') as schema_file:
+            schema_file.write(b'{}')
+        os.utime(path, (loaded.last_modified + 10, loaded.last_modified + 10))
+        self.assertEqual(bytes(load_schema(self.directory, '1.0').content), b'{}')
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import unittest
+from collections import OrderedDict
+
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework import serializers
+
+from drf_openapi.representation import compiled_serializer
+
+
+class Gone(ObjectDoesNotExist, AttributeError):
+    pass
+
+
+class Author(object):
+
+    def __init__(self, pk, name):
+        self.pk = pk
+        self.name = name
+
+    def initials(self):
+        return self.name[:1]
+
+
+class Article(object):
+
+    def __init__(self, pk, title, author=None, tags=(), scores=None, status='draft'):
+        self.pk = pk
+        self.title = title
+        self.author = author
+        self.tags = list(tags)
+        self.scores = scores
+        self.status = status
+
+    @property
+    def deleted_relation(self):
+        raise Gone()
+
+    def word_count(self):
+        return len(self.title.split())
+
+
+class AuthorSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='pk')
+    name = serializers.CharField()
+    initials = serializers.CharField()
+
+
+class TagSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    weight = serializers.FloatField(required=False)
+
+
+class ArticleSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='pk', read_only=True)
+    title = serializers.CharField(max_length=100)
+    author = AuthorSerializer(allow_null=True)
+    author_name = serializers.CharField(source='author.name', default='anonymous')
+    tags = TagSerializer(many=True)
+    scores = serializers.ListField(child=serializers.IntegerField(), allow_null=True, required=False)
+    status = serializers.ChoiceField(choices=(('draft', 'Draft'), ('published', 'Published'), (1, 'One'), ('2', 'Two')))
+    word_count = serializers.ReadOnlyField()
+    deleted_relation = serializers.CharField(required=False)
+    summary = serializers.SerializerMethodField()
+    published = serializers.BooleanField(required=False, source='*')
+
+    def get_summary(self, article):
+        return '{} ({})'.format(article.title, len(article.tags))
+
+    def to_internal_value(self, data):
+        return data
+
+
+class CustomRepresentationSerializer(ArticleSerializer):
+
+    def to_representation(self, instance):
+        return {'custom': instance.title}
+
+
+ARTICLES = [
+    Article(1, 'Hello world', Author(1, 'Ada'), tags=[{'name': 'intro', 'weight': 1}], scores=[1, 2, None]),
+    Article(2, 'Untitled', None, scores=None, status=1),
+    Article(4, 'Two', None, status=2),
+    Article(3, u'Ünïcode title here', Author(2, 'Grace'), tags=[{'name': 'x'}, {'name': 'y', 'weight': '2.5'}],
+            scores=['4'], status='unknown'),
+]
+
+MAPPINGS = [
+    {'pk': 1, 'title': 'Mapping', 'author': {'pk': 3, 'name': 'Linus', 'initials': 'L'}, 'tags': [],
+     'status': 'published', 'word_count': 1, 'deleted_relation': 'here', 'published': True},
+    OrderedDict([('pk', 2), ('title', 'Partial'), ('author', None), ('tags', []), ('status', '')]),
+]
+
+
+class CompiledSerializerTest(unittest.TestCase):
+
+    def assertSameRepresentation(self, serializer_class, instance, **kwargs):
+        compiled = compiled_serializer(serializer_class)
+        self.assertIsNot(compiled, serializer_class)
+        self.assertEqual(compiled(instance, **kwargs).data, serializer_class(instance, **kwargs).data)
+
+    def test_objects(self):
+        for article in ARTICLES:
+            self.assertSameRepresentation(ArticleSerializer, article)
+
+    def test_many_objects(self):
+        self.assertSameRepresentation(ArticleSerializer, ARTICLES, many=True)
+
+    def test_mappings(self):
+        self.assertSameRepresentation(TagSerializer, [{'name': 'a'}, {'name': 'b', 'weight': 3}], many=True)
+        compiled = compiled_serializer(ArticleSerializer)
+        for mapping in MAPPINGS:
+            try:
+                expected = ArticleSerializer(mapping).data
+            except (KeyError, AttributeError) as error:
+                self.assertRaises(type(error), lambda: compiled(mapping).data)
+            else:
+                self.assertEqual(compiled(mapping).data, expected)
+
+    def test_representation_is_ordered(self):
+        compiled = compiled_serializer(ArticleSerializer)
+        self.assertEqual(list(compiled(ARTICLES[0]).data), list(ArticleSerializer(ARTICLES[0]).data))
+
+    def test_missing_attribute(self):
+        serializer_class = type('TitleSerializer', (serializers.Serializer,), {'title': serializers.CharField()})
+        with self.assertRaises(AttributeError):
+            compiled_serializer(serializer_class)(object()).data
+
+    def test_custom_to_representation_is_kept(self):
+        self.assertIs(compiled_serializer(CustomRepresentationSerializer), CustomRepresentationSerializer)
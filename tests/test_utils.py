@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+import random
+import threading
+import unittest
+
+from django.test import override_settings
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from drf_openapi import utils, validation
+from drf_openapi.signals import response_validation_failed, response_validation_skipped
+from drf_openapi.utils import view_config
+from drf_openapi.versioning import VersionedSerializers
+
+
+class SnippetSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=10)
+    code = serializers.CharField()
+
+
+class BlockingSerializer(SnippetSerializer):
+    started = threading.Event()
+    release = threading.Event()
+
+    def validate(self, attrs):
+        self.started.set()
+        self.release.wait(5)
+        return attrs
+
+
+def make_view(data, **config):
+    class SnippetView(object):
+
+        @view_config(response_serializer=SnippetSerializer, validate_response=True, **config)
+        def get(self, request, version):
+            return Response(data)
+
+    return SnippetView()
+
+
+def make_request():
+    return Request(APIRequestFactory().get('/snippets/'))
+
+
+class Receiver(object):
+
+    def __init__(self, signal):
+        self.calls = []
+        self.called = threading.Event()
+        self.signal = signal
+        signal.connect(self)
+
+    def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        self.called.set()
+
+    def disconnect(self):
+        self.signal.disconnect(self)
+
+
+class ResponseValidationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.failed = Receiver(response_validation_failed)
+        self.addCleanup(self.failed.disconnect)
+
+    def test_replaces_validated_responses(self):
+        data = {'title': 'Hello', 'code': 'print()', 'extra': 1}
+        response = make_view(data).get(make_request(), version='1.0')
+        self.assertEqual(response.data, {'title': 'Hello', 'code': 'print()'})
+
+        response = make_view(data, replace_response=False).get(make_request(), version='1.0')
+        self.assertIs(response.data, data)
+
+    def test_sample_rate(self):
+        invalid = {'title': 'Too long for the serializer'}
+        # Never sampled, invalid responses go through
+        response = make_view(invalid, sample_rate=0).get(make_request(), version='1.0')
+        self.assertIs(response.data, invalid)
+
+        random.seed(1)
+        view = make_view(invalid, sample_rate=0.25)
+        failures = 0
+        for _ in range(1000):
+            try:
+                view.get(make_request(), version='1.0')
+            except serializers.ValidationError:
+                failures += 1
+        self.assertTrue(150 < failures < 350, failures)
+
+        with override_settings(DRF_OPENAPI={'RESPONSE_VALIDATION_SAMPLE_RATE': 0}):
+            self.assertIs(make_view(invalid).get(make_request(), version='1.0').data, invalid)
+
+    def test_shadow_validation_leaves_the_response(self):
+        data = {'title': 'Too long for the serializer', 'code': 'print()'}
+        response = make_view(data, shadow_validation=True).get(make_request(), version='1.0')
+        self.assertIs(response.data, data)
+
+        self.assertTrue(self.failed.called.wait(5))
+        call, = self.failed.calls
+        self.assertIs(call['serializer_class'], SnippetSerializer)
+        self.assertEqual(list(call['errors']), ['title'])
+        self.assertEqual(call['request'].path, '/snippets/')
+
+    def test_shadow_validation_of_valid_responses(self):
+        data = {'title': 'Hello', 'code': 'print()'}
+        validation.shadow_validate(SnippetSerializer, data, object(), make_request()).result(5)
+        self.assertEqual(self.failed.calls, [])
+
+
+class ShadowValidationBacklogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.skipped = Receiver(response_validation_skipped)
+        self.addCleanup(self.skipped.disconnect)
+        self.addCleanup(self.reset_executor)
+        self.reset_executor()
+
+    def reset_executor(self):
+        if validation._executor is not None:
+            validation._executor.shutdown()
+        validation._executor = validation._backlog = None
+
+    @override_settings(DRF_OPENAPI={'SHADOW_VALIDATION_WORKERS': 1, 'SHADOW_VALIDATION_BACKLOG': 2})
+    def test_skips_responses_beyond_the_backlog(self):
+        data = {'title': 'Hello', 'code': 'print()'}
+        BlockingSerializer.started.clear()
+        BlockingSerializer.release.clear()
+        running = validation.shadow_validate(BlockingSerializer, data, object(), make_request())
+        self.assertTrue(BlockingSerializer.started.wait(5))
+        waiting = validation.shadow_validate(BlockingSerializer, data, object(), make_request())
+        self.assertIsNotNone(waiting)
+
+        self.assertIsNone(validation.shadow_validate(BlockingSerializer, data, object(), make_request()))
+        call, = self.skipped.calls
+        self.assertIs(call['serializer_class'], BlockingSerializer)
+
+        BlockingSerializer.release.set()
+        running.result(5)
+        waiting.result(5)
+        self.assertIsNotNone(validation.shadow_validate(SnippetSerializer, data, object(), make_request()))
+
+
+class SnippetSerializerV2(SnippetSerializer):
+    language = serializers.CharField()
+
+
+class VersionedSnippetSerializer(VersionedSerializers):
+    VERSION_MAP = (
+        ('>=1.0, <2.0', SnippetSerializer),
+        ('>=2.0', SnippetSerializerV2),
+    )
+
+
+class SerializersView(object):
+    """Returns the serializers view_config bound to it."""
+
+    def get(self, request, version):
+        return self.request_serializer, self.response_serializer
+
+
+def decorate(**config):
+    view = SerializersView()
+    view.get = view_config(**config)(SerializersView.get).__get__(view)
+    return view
+
+
+class DispatchTest(unittest.TestCase):
+
+    def test_versioned_serializers(self):
+        view = decorate(request_serializer=VersionedSnippetSerializer, response_serializer=VersionedSnippetSerializer)
+        self.assertEqual(view.get(make_request(), version='1.5'), (SnippetSerializer, SnippetSerializer))
+        self.assertEqual(view.get(make_request(), version='2.0'), (SnippetSerializerV2, SnippetSerializerV2))
+        # Dispatched from the table
+        self.assertEqual(view.get(make_request(), version='1.5'), (SnippetSerializer, SnippetSerializer))
+
+    def test_unknown_versions(self):
+        view = decorate(response_serializer=VersionedSnippetSerializer)
+        for version in ('0.5', 'latest', None):
+            with self.assertRaises(NotFound):
+                view.get(make_request(), version=version)
+
+    def test_single_serializer(self):
+        view = decorate(response_serializer=VersionedSnippetSerializer)
+        self.assertEqual(view.get(make_request(), version='2.0'), (None, SnippetSerializerV2))
+        view = decorate(request_serializer=VersionedSnippetSerializer)
+        self.assertEqual(view.get(make_request(), version='1.0'), (SnippetSerializer, None))
+        # Plain serializers serve every version
+        view = decorate(request_serializer=SnippetSerializer)
+        for version in ('1.0', '0.5', None):
+            self.assertEqual(view.get(make_request(), version=version), (SnippetSerializer, None))
+        view = decorate()
+        self.assertEqual(view.get(make_request(), version='1.0'), (None, None))
+
+    def test_table_is_bounded(self):
+        view = decorate(response_serializer=VersionedSnippetSerializer)
+        table = next(cell.cell_contents for cell in view.get.__func__.__closure__
+                     if isinstance(cell.cell_contents, dict))
+        count = utils.MAX_DISPATCH_VERSIONS + 10
+        for minor in range(count):
+            version = '2.{}'.format(minor)
+            self.assertEqual(view.get(make_request(), version=version), (None, SnippetSerializerV2))
+        self.assertEqual(len(table), utils.MAX_DISPATCH_VERSIONS)
+        # Versions beyond the table are still resolved
+        self.assertEqual(view.get(make_request(), version='2.{}'.format(count - 1)), (None, SnippetSerializerV2))
+        self.assertNotIn('2.{}'.format(count - 1), table)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import itertools
+import unittest
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import fields, serializers
+
+from drf_openapi.validation import get_request_validator
+
+
+class AnythingField(fields.Field):
+
+    def to_internal_value(self, data):
+        return data
+
+
+class LenientIntegerField(fields.IntegerField):
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            return len(data)
+        return super(LenientIntegerField, self).to_internal_value(data)
+
+
+def no_zeros(value):
+    if '0' in value:
+        raise DjangoValidationError('No zeros')
+
+
+class PointSerializer(serializers.Serializer):
+    x = serializers.IntegerField()
+    y = serializers.IntegerField(required=False)
+
+
+class PayloadSerializer(serializers.Serializer):
+    name = serializers.CharField(min_length=2, max_length=5, required=False)
+    raw = serializers.CharField(min_length=2, max_length=5, trim_whitespace=False, required=False)
+    blank = serializers.CharField(min_length=2, allow_blank=True, required=False)
+    code = serializers.CharField(validators=[no_zeros], required=False)
+    flag = serializers.BooleanField(required=False)
+    maybe = serializers.NullBooleanField(required=False)
+    anything = AnythingField(required=False)
+    lenient = LenientIntegerField(required=False)
+    count = serializers.IntegerField(required=False)
+    ratio = serializers.FloatField(required=False)
+    price = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    day = serializers.DateField(required=False)
+    status = serializers.ChoiceField(choices=[('a', 'A'), (2, 'Two')], required=False)
+    statuses = serializers.MultipleChoiceField(choices=['a', 'b'], required=False)
+    tags = serializers.ListField(child=serializers.CharField(), required=False)
+    extra = serializers.DictField(required=False)
+    point = PointSerializer(required=False)
+    points = PointSerializer(many=True, required=False)
+    token = serializers.CharField(required=True)
+
+
+VALUES = (
+    None, True, False, 0, 1, 2, 1.5, '', ' ', '   ', 'a', ' ab ', 'abcdef', '  abcde  ', 'ab0', '2', 'true', 'null',
+    '2017-01-01', '1.5', [], ['a'], ['a', 1], ('a',), {}, {'x': 1}, [{'x': 1}], [{'y': 1}], {'a': 'b'},
+)
+
+
+class RequestValidatorTest(unittest.TestCase):
+
+    def assertAgrees(self, data, method='POST'):
+        serializer = PayloadSerializer(data=data, partial=method == 'PATCH')
+        valid = serializer.is_valid()
+        errors = get_request_validator(PayloadSerializer, method)(data)
+        if valid:
+            self.assertEqual(errors, {}, data)
+        for name, error in errors.items():
+            self.assertEqual(error, serializer.errors[name], data)
+        return errors
+
+    def test_never_rejects_accepted_values(self):
+        for name, value in itertools.product(PayloadSerializer().fields, VALUES):
+            data = {'token': 'x', name: value}
+            self.assertAgrees(data)
+            self.assertAgrees(data, method='PATCH')
+
+    def test_required(self):
+        self.assertEqual(list(self.assertAgrees({})), ['token'])
+        self.assertEqual(self.assertAgrees({}, method='PATCH'), {})
+
+    def test_not_an_object(self):
+        for data in ([], 'a', 1):
+            self.assertEqual(list(self.assertAgrees(data)), ['non_field_errors'])
+
+    def test_custom_fields_are_not_checked(self):
+        self.assertEqual(self.assertAgrees({'token': 'x', 'maybe': True}), {})
+        self.assertEqual(self.assertAgrees({'token': 'x', 'anything': {'a': 'b'}}), {})
+        self.assertEqual(self.assertAgrees({'token': 'x', 'lenient': {'a': 'b'}}), {})
+
+    def test_lengths_of_stripped_strings(self):
+        self.assertEqual(self.assertAgrees({'token': 'x', 'name': ' ab '}), {})
+        self.assertEqual(list(self.assertAgrees({'token': 'x', 'name': ' a  '})), ['name'])
+        self.assertEqual(self.assertAgrees({'token': 'x', 'raw': ' a  '}), {})
+        self.assertEqual(list(self.assertAgrees({'token': 'x', 'raw': ' abcde '})), ['raw'])
+        self.assertEqual(self.assertAgrees({'token': 'x', 'blank': '   '}), {})
+
+    def test_rejects_invalid_values(self):
+        errors = self.assertAgrees({
+            'token': 'x', 'name': 'abcdef', 'flag': 'maybe', 'count': [], 'status': 'b', 'tags': 'a',
+            'point': [], 'points': {}})
+        self.assertEqual(list(errors), ['name', 'flag', 'count', 'status', 'tags', 'point', 'points'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import itertools
+import unittest
+import warnings
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+
+from drf_openapi.versioning import VersionedSerializers, parse_version
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        from pkg_resources import parse_version as pkg_resources_parse_version
+        # Recent setuptools dropped the legacy versions
+        pkg_resources_parse_version('latest')
+except Exception:  # pragma: no cover
+    pkg_resources_parse_version = None
+
+VERSIONS = (
+    '0.0.dev0', '0.9', '1', '1.0', '1.0.0', ' 1.0 ', 'v1.0', '1.0a1', '1.0alpha2', '1.0b1', '1.0-beta.3', '1.0c1',
+    '1.0rc1', '1.0pre2', '1.0preview3', '1.0.dev0', '1.0a1.dev2', '1.0-1', '1.0.post1', '1.0-r5', '1.0rev1',
+    '1.0.post1.dev3', '1.0+abc', '1.0+abc.5', '1.0+5', '1!0.5', '1.2.3.4.5', '1.10', '2.0', '10.0',
+    'latest', 'v2-beta', 'foo-1.0', '1.0-SNAPSHOT', '1.0.x', 'release-2', 'abc-1.0-2', '1-2-3', 'a', 'b', '2.0-pre',
+)
+
+
+class ParseVersionTest(unittest.TestCase):
+
+    @unittest.skipIf(pkg_resources_parse_version is None, 'setuptools without legacy versions')
+    def test_ordered_like_pkg_resources(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            expected = dict((version, pkg_resources_parse_version(version)) for version in VERSIONS)
+        parsed = dict((version, parse_version(version)) for version in VERSIONS)
+        for left, right in itertools.product(VERSIONS, repeat=2):
+            self.assertEqual(
+                (parsed[left] < parsed[right], parsed[left] == parsed[right]),
+                (expected[left] < expected[right], expected[left] == expected[right]), (left, right))
+
+    def test_legacy_versions(self):
+        self.assertTrue(parse_version('latest').legacy)
+        self.assertFalse(parse_version('1.0').legacy)
+        self.assertLess(parse_version('latest'), parse_version('0.0.dev0'))
+        self.assertLess(parse_version('v2-beta'), parse_version('v2-rc'))
+        self.assertEqual(str(parse_version('v2-beta')), 'v2-beta')
+
+    def test_equal_releases(self):
+        self.assertEqual(parse_version('1'), parse_version('1.0.0'))
+        self.assertEqual(parse_version('1.0-1'), parse_version('1.0.post1'))
+        self.assertLess(parse_version('1.0.dev0'), parse_version('1.0a1'))
+        self.assertLess(parse_version('1.0'), parse_version('1.0+abc'))
+
+
+class V1(serializers.Serializer):
+    pass
+
+
+class V2(serializers.Serializer):
+    pass
+
+
+class V3(serializers.Serializer):
+    pass
+
+
+with warnings.catch_warnings():
+    # No serializer for the versions between 1.6 and 2.0
+    warnings.simplefilter('ignore', RuntimeWarning)
+
+    class SnippetSerializer(VersionedSerializers):
+        VERSION_MAP = (
+            ('>1.3, <=1.6', V2),
+            ('<=1.3', V1),
+            ('>=2.0, <3.0', V3),
+        )
+
+
+class VersionMapTest(unittest.TestCase):
+
+    def define(self, version_map):
+        """Return the VersionedSerializers of ``version_map``, keeping the warnings it raised in ``self.warnings``."""
+        with warnings.catch_warnings(record=True) as self.warnings:
+            warnings.simplefilter('always')
+            return type('Serializer', (VersionedSerializers,), {'VERSION_MAP': version_map})
+
+    def test_resolve(self):
+        for version, serializer in (('0.1', V1), ('1.3', V1), ('1.3.1', V2), ('1.6', V2), ('1.6.0', V2),
+                                    ('1.7', None), ('2.0', V3), ('2.9.9', V3), ('3.0', None), ('latest', V1),
+                                    (None, None), (2.0, None)):
+            self.assertIs(SnippetSerializer.resolve(version), serializer, version)
+
+    def test_every_clause_counts(self):
+        serializer = self.define((('>1.3, <=1.6', V2),))
+        self.assertIs(serializer.resolve('1.5'), V2)
+        self.assertIsNone(serializer.resolve('1.0'))
+        self.assertIsNone(serializer.resolve('1.7'))
+        serializer = self.define((('>=1.0, >=1.2, <2.0, <1.8', V2),))
+        self.assertIsNone(serializer.resolve('1.1'))
+        self.assertIs(serializer.resolve('1.2'), V2)
+        self.assertIsNone(serializer.resolve('1.8'))
+        serializer = self.define((('==1.0', V1), ('1.1', V2)))
+        self.assertIs(serializer.resolve('1.0.0'), V1)
+        self.assertIs(serializer.resolve('1.1'), V2)
+        self.assertIsNone(serializer.resolve('1.0.1'))
+
+    def test_overlapping_versions(self):
+        for version_map in ((('>=1.0', V1), ('>=2.0', V2)),
+                            (('<=2.0', V1), ('>=2.0', V2)),
+                            (('>1.0, <3.0', V1), ('2.0', V2)),
+                            (('<2.0', V1), ('<1.0', V2))):
+            with self.assertRaises(ImproperlyConfigured):
+                self.define(version_map)
+        # Touching bounds don't overlap
+        self.define((('<2.0', V1), ('>=2.0', V2)))
+        self.define((('<=2.0', V1), ('>2.0', V2)))
+
+    def test_empty_ranges(self):
+        for allowed_version in ('>2.0, <1.0', '>1.0, <1.0', '>=1.0, <1.0', '1.0, 2.0'):
+            with self.assertRaises(ImproperlyConfigured):
+                self.define(((allowed_version, V1),))
+        self.assertIs(self.define((('>=1.0, <=1.0', V1),)).resolve('1.0'), V1)
+
+    def test_gaps(self):
+        for version_map in ((('<1.0', V1), ('>1.0', V2)), (('<1.0', V1), ('>=1.5', V2))):
+            self.define(version_map)
+            self.assertEqual([warning.category for warning in self.warnings], [RuntimeWarning])
+        self.define((('<1.0', V1), ('>=1.0', V2)))
+        self.assertEqual(self.warnings, [])
+
+    def test_get_memoizes(self):
+        serializer = self.define((('>=1.0', V1),))
+        self.assertIs(serializer.get('1.0'), V1)
+        self.assertEqual(serializer._resolved_versions, {'1.0': V1})
+        # Served from the memo
+        serializer._resolved_versions['1.0'] = V2
+        self.assertIs(serializer.get('1.0'), V2)
+        with self.assertRaises(ValueError):
+            serializer.get('0.5')
+        self.assertNotIn('0.5', serializer._resolved_versions)
+
+    def test_get_memo_is_bounded(self):
+        serializer = self.define((('>=1.0', V1),))
+        serializer.MAX_RESOLVED_VERSIONS = 3
+        for minor in range(10):
+            self.assertIs(serializer.get('1.{}'.format(minor)), V1)
+        self.assertEqual(len(serializer._resolved_versions), 3)
+
+    def test_subclasses_compile_their_map(self):
+        serializer = self.define((('>=1.0', V1),))
+        subclass = type('Subclass', (serializer,), {'VERSION_MAP': (('>=1.0', V2),)})
+        self.assertIs(serializer.get('1.0'), V1)
+        self.assertIs(subclass.get('1.0'), V2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from tests.urls import CountingOpenAPIRenderer, CountingSchemaView
+
+
+@override_settings(ROOT_URLCONF='tests.urls', ALLOWED_HOSTS=['testserver'])
+class ConditionalSchemaTest(SimpleTestCase):
+
+    def setUp(self):
+        CountingSchemaView.invalidate_cache()
+        CountingOpenAPIRenderer.encoded = 0
+
+    def get(self, version='1.0', **headers):
+        return self.client.get('/v{}/schema/'.format(version), {'format': 'openapi'}, **headers)
+
+    def test_validators(self):
+        res = self.get()
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('/v1.0/snippets/', json.loads(res.content.decode('utf-8'))['paths'])
+        self.assertTrue(res['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', res)
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 1)
+
+        # Served from the same encoding
+        again = self.get()
+        self.assertEqual(again.content, res.content)
+        self.assertEqual(again['ETag'], res['ETag'])
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 1)
+
+        # Other versions have their own
+        self.assertNotEqual(self.get('2.0')['ETag'], res['ETag'])
+
+    def test_if_none_match(self):
+        etag = self.get()['ETag']
+        res = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 1)
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 1)
+
+    def test_if_modified_since(self):
+        last_modified = self.get()['Last-Modified']
+        res = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 1)
+
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=http_date(time.time() - 3600)).status_code, 200)
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 1)
+
+    def test_invalidated(self):
+        etag = self.get()['ETag']
+        CountingSchemaView.invalidate_cache('1.0')
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 2)
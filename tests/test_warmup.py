@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import logging
+from timeit import default_timer
+
+from django.test import SimpleTestCase, override_settings
+
+from drf_openapi.cache import SchemaCache
+from drf_openapi.views import SchemaView
+from drf_openapi.warmup import WarmupTimeout, warm_up, warm_up_version
+from tests.urls import CountingOpenAPIRenderer, CountingSchemaView
+
+
+class AdminSchemaView(SchemaView):
+    schema_cache = SchemaCache()
+    shared_schema_cache = None
+
+
+@override_settings(ROOT_URLCONF='tests.urls', ALLOWED_HOSTS=['testserver'])
+class WarmupTest(SimpleTestCase):
+
+    def setUp(self):
+        CountingSchemaView.invalidate_cache()
+        AdminSchemaView.invalidate_cache()
+        CountingOpenAPIRenderer.encoded = 0
+
+    def test_warm_up_version(self):
+        self.assertTrue(warm_up_version(CountingSchemaView, '1.0'))
+        self.assertEqual(len(CountingSchemaView.schema_cache), 1)
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 1)
+
+        # Served from the cache from now on
+        res = self.client.get('/v1.0/schema/', {'format': 'openapi'})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 1)
+
+    def test_anonymous_users_may_not_access_the_view(self):
+        self.assertFalse(warm_up_version(AdminSchemaView, '1.0'))
+        self.assertEqual(len(AdminSchemaView.schema_cache), 0)
+
+    @override_settings(DRF_OPENAPI={'FILTER_BY_PERMISSIONS': True})
+    def test_filtered_schemas(self):
+        # The links of every endpoint are generated whoever may access the view
+        self.assertTrue(warm_up_version(AdminSchemaView, '1.0'))
+        self.assertGreater(len(AdminSchemaView.schema_cache), 0)
+
+    def test_deadline(self):
+        with self.assertRaises(WarmupTimeout):
+            warm_up_version(CountingSchemaView, '1.0', deadline=default_timer())
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 0)
+
+    def test_warm_up(self):
+        thread = warm_up(['1.0', '2.0'], CountingSchemaView)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(CountingSchemaView.schema_cache), 2)
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 2)
+
+    @override_settings(DRF_OPENAPI={'WARMUP_VERSIONS': ['2.0'], 'WARMUP_VIEW': 'tests.urls.CountingSchemaView'})
+    def test_settings(self):
+        warm_up()
+        self.assertEqual([key[0] for key in CountingSchemaView.schema_cache._entries], ['2.0'])
+
+    def test_logs_versions_without_schema(self):
+        with self.assertLogs('drf_openapi.warmup', logging.WARNING) as logs:
+            warm_up(['1.0'], AdminSchemaView)
+        self.assertIn('Nothing to warm up for version 1.0', logs.output[0])
+
+    @override_settings(DRF_OPENAPI={'WARMUP_TIMEOUT': 0})
+    def test_timeout(self):
+        with self.assertLogs('drf_openapi.warmup', logging.WARNING) as logs:
+            thread = warm_up(['1.0', '2.0'], CountingSchemaView)
+            thread.join(5)
+        self.assertIn('timed out', logs.output[0])
+        self.assertEqual(len(CountingSchemaView.schema_cache), 0)
+        self.assertEqual(CountingOpenAPIRenderer.encoded, 0)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""URLs of the views the tests serve, as ROOT_URLCONF."""
+from django.conf.urls import url
+from rest_framework import permissions, serializers
+from rest_framework.renderers import CoreJSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_openapi.cache import SchemaCache
+from drf_openapi.codec import OpenAPIRenderer
+from drf_openapi.utils import view_config
+from drf_openapi.views import SchemaView
+
+API_PREFIX = r'^v(?P<version>[0-9]+\.[0-9]+)'
+
+
+class SnippetSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=100, help_text='The title')
+    code = serializers.CharField()
+
+
+class SnippetList(APIView):
+    permission_classes = (permissions.AllowAny,)
+
+    @view_config(response_serializer=SnippetSerializer)
+    def get(self, request, version):
+        """List the snippets."""
+        return Response([])
+
+
+class CountingOpenAPIRenderer(OpenAPIRenderer):
+    """Counts the schemas it encodes."""
+    encoded = 0
+
+    def encode_host_independent(self, document, compact=None, timer=None):
+        CountingOpenAPIRenderer.encoded += 1
+        return super(CountingOpenAPIRenderer, self).encode_host_independent(document, compact=compact, timer=timer)
+
+
+class CountingSchemaView(SchemaView):
+    permission_classes = (permissions.AllowAny,)
+    renderer_classes = (CoreJSONRenderer, CountingOpenAPIRenderer)
+    schema_cache = SchemaCache()
+    shared_schema_cache = None
+
+
+urlpatterns = [
+    url(API_PREFIX + r'/schema/$', CountingSchemaView.as_view(), name='api_schema'),
+    url(API_PREFIX + r'/snippets/$', SnippetList.as_view(), name='snippets'),
+]